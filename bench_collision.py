@@ -0,0 +1,98 @@
+import sys
+import time
+import argparse
+
+import numpy as np
+
+import collision # Registers the 'panda' backend  # noqa: F401
+from simulation import COLLISION_BACKENDS, Simulation, make_collision_backend
+
+# Collision backend benchmark: plays a seeded round per fleet size with the AI flying every
+# rocket. On every measured tick each backend's first_hits runs on the same inputs and is
+# timed; the round itself follows the first backend's hits, which the others are checked
+# against. Hits on the player are dropped so the round cannot end early. `differ` counts
+# bullets whose hit (or miss) differs from the reference's, also as a share of its hits;
+# pairs/tick is left blank for backends that cannot count the pairs they test.
+#
+#   python bench_collision.py                        # 200, 1000 and 5000 rockets, all backends
+#   python bench_collision.py --rockets 1000 --ticks 300 --backends cone panda
+
+# --- Configuration & Constants ---
+DEFAULT_FLEETS = (200, 1000, 5000)
+DEFAULT_WARMUP_TICKS = 60 # Ticks played before measuring, so bullets are in flight
+DEFAULT_TICKS = 120
+
+
+# Stands in for the Simulation's collision backend and runs every backend on each call
+class BackendRace:
+    def __init__(self, backends, spared=0):
+        self.backends = backends
+        self.spared = spared # Slot whose rocket is never hit
+        self.measuring = False
+        self.times = {backend.name: [] for backend in backends}
+        self.pairs = {backend.name: 0 for backend in backends}
+        self.hits = {backend.name: 0 for backend in backends}
+        self.differ = {backend.name: 0 for backend in backends}
+        self.bullets = []
+
+    def first_hits(self, *args):
+        results = []
+        for backend in self.backends if self.measuring else self.backends[:1]:
+            start = time.perf_counter()
+            hits, pairs = backend.first_hits(*args)
+            elapsed = time.perf_counter() - start
+            results.append(hits)
+            if not self.measuring: continue
+            self.times[backend.name].append(elapsed)
+            if pairs is None: self.pairs[backend.name] = None
+            elif self.pairs[backend.name] is not None: self.pairs[backend.name] += pairs
+            self.hits[backend.name] += np.count_nonzero(hits >= 0)
+            self.differ[backend.name] += np.count_nonzero(hits != results[0])
+        if self.measuring: self.bullets.append(len(args[5]))
+        slots, hits = args[0], results[0].copy()
+        hits[(hits >= 0) & (slots[np.maximum(hits, 0)] == self.spared)] = -1
+        return hits, 0
+
+def run_fleet(num_rockets, names, seed, warmup_ticks, ticks):
+    race = BackendRace([make_collision_backend(name) for name in names])
+    sim = Simulation(num_rockets=num_rockets, seed=seed, player_ai=True, collision=race)
+    race.spared = sim.player
+    for _ in range(warmup_ticks): sim.step()
+    race.measuring = True
+    for _ in range(ticks):
+        if sim.result is not None: break
+        sim.step()
+    return race, sim
+
+def print_fleet(num_rockets, race, sim):
+    ticks = len(race.bullets)
+    if ticks == 0:
+        print(f"{num_rockets} rockets: the round ended before any tick was measured")
+        return
+    print(f"{num_rockets} rockets: {ticks} ticks, {np.mean(race.bullets):.0f} bullets in flight on average, "
+          f"{sim.alive_count} rockets left")
+    print(f"  {'backend':<8}{'mean ms':>9}{'p95 ms':>9}{'pairs/tick':>12}{'hits':>7}{'differ':>8}{'':>7}")
+    reference_hits = max(next(iter(race.hits.values())), 1)
+    for name, times in race.times.items():
+        ms = np.array(times) * 1000.0
+        pairs = "-" if race.pairs[name] is None else f"{race.pairs[name] / ticks:.0f}"
+        print(f"  {name:<8}{ms.mean():>9.2f}{np.percentile(ms, 95):>9.2f}{pairs:>12}"
+              f"{race.hits[name]:>7}{race.differ[name]:>8}{race.differ[name] / reference_hits:>7.0%}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the collision backends on the same simulated ticks.")
+    parser.add_argument('--rockets', type=int, nargs='+', default=list(DEFAULT_FLEETS))
+    parser.add_argument('--backends', nargs='+', choices=sorted(COLLISION_BACKENDS), default=['cone', 'panda'],
+                        help="the first is the reference the round follows")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP_TICKS)
+    parser.add_argument('--ticks', type=int, default=DEFAULT_TICKS)
+    args = parser.parse_args(argv)
+
+    for num_rockets in args.rockets:
+        race, sim = run_fleet(num_rockets, args.backends, args.seed, args.warmup, args.ticks)
+        print_fleet(num_rockets, race, sim)
+        sys.stdout.flush()
+
+if __name__ == "__main__":
+    main()
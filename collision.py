@@ -0,0 +1,197 @@
+import math
+
+import numpy as np
+from panda3d.core import (
+    BitMask32, CollisionHandlerQueue, CollisionNode, CollisionPolygon, CollisionSegment, CollisionTraverser,
+    LMatrix4f, NodePath, Point3,
+)
+
+from simulation import (
+    COLLISION_BACKENDS, BULLET_RADIUS, ROCKET_CONE_HEIGHT, ROCKET_CONE_RADIUS, ROCKET_SCALE, SWEEP_MAX_PIECES,
+    ConeCollider, arc_points, heading_rows, orientation_bases,
+)
+
+# Panda3D CollisionTraverser backend for Simulation bullet collisions. Every rocket is one
+# CollisionNode whose polygons enclose its bullet-padded cone, a frustum; every bullet is a
+# CollisionSegment along one piece of its move, and the scene is traversed once per cut
+# between pieces (see first_hits). The traverser only culls by node bounds, so rockets hang
+# under a two-level grid of cell nodes, and bullets are grouped into one collider node per
+# cell: with one collider node per bullet it makes a full pass over the scene for every 32
+# of them.
+#
+# This approximates SweptConeBackend: hits that graze the cone can differ with the facets and
+# with the rockets' drift between poses, and a segment that lies wholly inside a cone crosses
+# none of its polygons, so a bullet that starts a tick inside a rocket is not reported.
+# bench_collision.py measured 11% of hits differing from the reference at 1000 rockets and
+# 13% at 5000 (the `differ` column), close to the share that differs with the rockets held
+# still, where only the facets are left; each tick costs a traversal per cut, about 275 ms at
+# 1000 rockets. The round still plays out differently, so it is not fit for tournaments or
+# replays that must match the reference. CollisionTraverser does not say how many solids it
+# tested, so first_hits reports no pair count.
+
+# --- Configuration & Constants ---
+ROCKET_HITBOX_SIDES = 8 # Even, so the end caps split into quads
+ROCKET_CELL_SIZE = 60.0 # Edge of the cells the rocket nodes are grouped under
+ROCKET_REGION_SIZE = 300.0 # Edge of the regions the cells are grouped under
+BULLET_CELL_SIZE = 150.0 # Edge of the cells whose bullets share one collider node
+POSE_MAX_DRIFT = 0.15 # Furthest a rocket may move between two of its poses in a tick
+
+def hitbox_polygons(sides=ROCKET_HITBOX_SIDES):
+    # Vertex lists of the padded cone as a `sides`-sided frustum in the rocket's scaled local
+    # space, faces wound outwards. cone_entry_times pads the cone by BULLET_RADIUS from
+    # ROCKET_CONE_RADIUS at the apex end to nothing at the base end, and each ring has the
+    # same area as the circle it stands for.
+    area_scale = math.sqrt(2.0 * math.pi / (sides * math.sin(2.0 * math.pi / sides)))
+    rings = []
+    for y, radius in ((-ROCKET_CONE_HEIGHT / 2.0, BULLET_RADIUS),
+                      (ROCKET_CONE_HEIGHT / 2.0, ROCKET_CONE_RADIUS + BULLET_RADIUS)):
+        angle = 2.0 * math.pi * np.arange(sides) / sides
+        ring = np.stack([np.cos(angle) * radius * area_scale, np.full(sides, y), np.sin(angle) * radius * area_scale], axis=1)
+        rings.append((ring * ROCKET_SCALE).tolist())
+    base, apex = rings
+    polygons = [(base[i], apex[i], apex[(i + 1) % sides], base[(i + 1) % sides]) for i in range(sides)]
+    for i in range(1, sides - 1, 2):
+        polygons.append((base[0], base[i], base[i + 1], base[i + 2])) # Faces -y
+        polygons.append((apex[0], apex[i + 2], apex[i + 1], apex[i])) # Faces +y
+    return polygons
+
+
+class PandaCollisionBackend:
+    name = 'panda'
+
+    def __init__(self):
+        self.root = NodePath("collision")
+        self.rocket_root = self.root.attachNewNode("rockets")
+        self.bullet_root = self.root.attachNewNode("bullets")
+        self.rocket_nodes = [] # Per slot, created on first use
+        self.rocket_cells = np.zeros((0, 3), dtype=np.int64) # Cell each rocket node hangs under
+        self.cells = {}
+        self.traverser = CollisionTraverser("bullets")
+        self.queue = CollisionHandlerQueue()
+        self.polygons = hitbox_polygons()
+        self.sweep = ConeCollider() # Only decides how many pieces each tick is cut into
+
+    def _rocket_node(self, slot):
+        while len(self.rocket_nodes) <= slot:
+            node = CollisionNode("rocket")
+            for polygon in self.polygons: node.addSolid(CollisionPolygon(*(Point3(*v) for v in polygon)))
+            node.setFromCollideMask(BitMask32.allOff())
+            node_path = NodePath(node)
+            node_path.setPythonTag('slot', len(self.rocket_nodes))
+            self.rocket_nodes.append(node_path)
+        return self.rocket_nodes[slot]
+
+    def _cell(self, key):
+        # The node for grid cell `key`, under the node for its region
+        cell = self.cells.get(key)
+        if cell is None:
+            region_key = ('region',) + tuple(math.floor(k * ROCKET_CELL_SIZE / ROCKET_REGION_SIZE) for k in key)
+            region = self.cells.get(region_key)
+            if region is None: region = self.cells[region_key] = self.rocket_root.attachNewNode("region")
+            cell = self.cells[key] = region.attachNewNode("cell")
+        return cell
+
+    def set_rockets(self, slots, pos, forward):
+        # Pose the rockets in `slots` and take every other rocket out of the scene
+        count = int(slots.max(initial=-1)) + 1
+        if count > len(self.rocket_cells):
+            self._rocket_node(count - 1)
+            grown = np.full((len(self.rocket_nodes), 3), np.iinfo(np.int64).min, dtype=np.int64)
+            grown[:len(self.rocket_cells)] = self.rocket_cells
+            self.rocket_cells = grown
+        gone = np.ones(len(self.rocket_cells), dtype=bool); gone[slots] = False
+        for slot in np.flatnonzero(gone & (self.rocket_cells[:, 0] != np.iinfo(np.int64).min)):
+            self.rocket_nodes[slot].detachNode()
+            self.rocket_cells[slot] = np.iinfo(np.int64).min
+
+        # Only rockets that crossed into another cell are reparented
+        cells = np.floor(pos / ROCKET_CELL_SIZE).astype(np.int64)
+        moved = np.flatnonzero((cells != self.rocket_cells[slots]).any(axis=1))
+        for i in moved.tolist():
+            self.rocket_nodes[slots[i]].reparentTo(self._cell(tuple(cells[i].tolist())))
+        self.rocket_cells[slots] = cells
+
+        # Cell nodes carry no transform, so each rocket's own is its pose in the world; Panda3D
+        # matrices take row vectors, so the rows are the local axes and then the position
+        mats = np.zeros((len(slots), 4, 4))
+        mats[:, :3, :3] = orientation_bases(pos, forward)
+        mats[:, 3, :3] = pos
+        mats[:, 3, 3] = 1.0
+        for slot, mat in zip(slots.tolist(), mats.reshape(-1, 16).tolist()):
+            self.rocket_nodes[slot].setMat(LMatrix4f(*mat))
+
+    def set_bullets(self, start, end):
+        # One collider node per cell of bullet segments; returns each segment's bullet index
+        self.bullet_root.getChildren().detach()
+        self.traverser.clearColliders()
+        groups, index = {}, {}
+        cells = map(tuple, np.floor((start + end) / (2.0 * BULLET_CELL_SIZE)).astype(np.int64).tolist())
+        for i, (a, b, key) in enumerate(zip(start.tolist(), end.tolist(), cells)):
+            node = groups.get(key)
+            if node is None:
+                node = groups[key] = CollisionNode("bullets")
+                node.setIntoCollideMask(BitMask32.allOff())
+            segment = CollisionSegment(Point3(*a), Point3(*b))
+            node.addSolid(segment)
+            index[segment] = i
+        for node in groups.values(): self.traverser.addCollider(self.bullet_root.attachNewNode(node), self.queue)
+        return index
+
+    def first_hits(self, slots, rocket_start, rocket_end, prev_forward, forward, start, end, shooters, world_radius):
+        first = np.full(len(start), -1, dtype=np.intp)
+        if len(start) == 0 or len(slots) == 0: return first, None
+        # The tick is cut into as many pieces as ConeCollider would sweep it in, or more if a
+        # rocket would move further than POSE_MAX_DRIFT over one. The rockets are posed at each
+        # cut, where their pose is exact, and tested against the bullets' pieces on either side
+        # of it: a pose held over a piece drifts from the true one by the rocket's move over it,
+        # and an entry the drift hides from one of the piece's two poses shows in the other.
+        self.sweep.set_rockets(slots, rocket_end, forward, rocket_start, prev_forward)
+        rocket_travel = np.sqrt(((rocket_end - rocket_start) ** 2).sum(axis=1)).max()
+        pieces = min(SWEEP_MAX_PIECES, max(self.sweep.sweep_pieces(start, end, np.arange(len(slots))),
+                                           math.ceil(rocket_travel / POSE_MAX_DRIFT)))
+        cuts = np.linspace(0.0, 1.0, pieces + 1)
+        points = np.stack([start] + [arc_points(start, end, s) for s in cuts[1:]])
+        entry = np.full(len(start), np.inf) # Earliest entry time found so far for each bullet
+        for cut, s in enumerate(cuts):
+            todo = np.flatnonzero(entry > cuts[max(cut - 1, 0)]) # Bullets still to be hit as early as these pieces
+            if len(todo) == 0: break
+            pos = arc_points(rocket_start, rocket_end, s)
+            self.set_rockets(slots, pos, heading_rows(prev_forward + (forward - prev_forward) * s, pos, fallback=forward))
+            piece = np.repeat([k for k in (cut - 1, cut) if 0 <= k < pieces], len(todo))
+            bullet = np.tile(todo, len(piece) // len(todo))
+            rocket, along = self._first_entries(slots, points[piece, bullet], points[piece + 1, bullet], shooters[bullet])
+            hit = rocket >= 0
+            bullet, rocket, time = bullet[hit], rocket[hit], cuts[piece[hit]] + along[hit] / pieces
+
+            # Keep each bullet's earliest entry over this cut's pieces and the ones before; ties go to slot order
+            bullet, rocket, time = (np.concatenate(a) for a in ((bullet, todo), (rocket, first[todo]), (time, entry[todo])))
+            order = np.lexsort((np.where(rocket < 0, len(slots), rocket), time, bullet))
+            kept, first_entry = np.unique(bullet[order], return_index=True)
+            first[kept], entry[kept] = rocket[order][first_entry], time[order][first_entry]
+        return first, None
+
+    def _first_entries(self, slots, start, end, shooters):
+        # For each segment, the position in `slots` of the rocket it enters first other than
+        # its shooter, or -1, and how far along the segment (0 to 1) it enters; ties go to slot
+        # order
+        first, along = np.full(len(start), -1, dtype=np.intp), np.full(len(start), np.inf)
+        index = self.set_bullets(start, end)
+        self.queue.clearEntries()
+        self.traverser.traverse(self.rocket_root)
+
+        entries = self.queue.entries
+        if not entries: return first, along
+        segment = np.array([index[entry.getFrom()] for entry in entries], dtype=np.intp)
+        rocket = np.array([entry.getIntoNodePath().getPythonTag('slot') for entry in entries], dtype=np.intp)
+        surface = np.array([tuple(entry.getSurfacePoint(self.root)) for entry in entries])
+        keep = shooters[segment] != rocket
+        segment, rocket, surface = segment[keep], rocket[keep], surface[keep]
+        length = np.maximum(np.sqrt(((end[segment] - start[segment]) ** 2).sum(axis=1)), 1e-12)
+        entry_along = np.sqrt(((surface - start[segment]) ** 2).sum(axis=1)) / length
+        order = np.lexsort((rocket, entry_along, segment))
+        hit_segments, first_entry = np.unique(segment[order], return_index=True)
+        first[hit_segments] = np.searchsorted(slots, rocket[order][first_entry])
+        along[hit_segments] = np.minimum(entry_along[order][first_entry], 1.0)
+        return first, along
+
+COLLISION_BACKENDS['panda'] = PandaCollisionBackend
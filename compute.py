@@ -0,0 +1,112 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+from simulation import BULLET_RADIUS, ROCKET_HIT_RADIUS
+
+# Host side of collision_compute.glsl and bullet_vert.glsl. The shaders read the rockets and
+# bullets from std140 shader storage buffers; the NumPy structured dtypes below have exactly
+# that layout, so a filled array *is* the buffer and its bytes go to the GPU without packing
+# element by element. A compute backend runs one dispatch of the kernel over a pair of these
+# arrays in place. CpuComputeBackend is the reference implementation and needs no GPU. A
+# module that runs the shader on a window's GSG registers itself with
+# COMPUTE_BACKENDS['gl'] = ..., the way collision.py registers its 'panda' collision
+# backend; reading the buffers back needs GraphicsEngine.extract_shader_buffer_data
+# (Panda3D 1.11 and later).
+
+# --- Configuration & Constants ---
+COMPUTE_GROUP_SIZE = 128 # Must match local_size_x in collision_compute.glsl
+BULLET_SURFACE_OFFSET = 0.1 # The kernel keeps bullets this far above the world surface
+# position_radius.w for every rocket: with the kernel's bullet_radius added it is
+# ROCKET_HIT_RADIUS, the sphere that bounds the simulation's cone hitbox
+ROCKET_BUFFER_RADIUS = ROCKET_HIT_RADIUS - BULLET_RADIUS
+
+# --- std140 Layouts ---
+# struct RocketData { vec4 position_radius; int is_active; vec3 padding; }
+#   the vec3 aligns to 16 bytes and the struct rounds up to a multiple of 16: 48 bytes
+ROCKET_STD140 = np.dtype({
+    'names': ['position_radius', 'is_active', 'padding'],
+    'formats': [('<f4', 4), '<i4', ('<f4', 3)],
+    'offsets': [0, 16, 32],
+    'itemsize': 48,
+})
+# struct BulletData { vec4 position_padding; vec3 velocity; float lifetime; }
+#   the float packs into the vec3's last 4 bytes: 32 bytes
+BULLET_STD140 = np.dtype({
+    'names': ['position_padding', 'velocity', 'lifetime'],
+    'formats': [('<f4', 4), ('<f4', 3), '<f4'],
+    'offsets': [0, 16, 28],
+    'itemsize': 32,
+})
+
+def buffer_bytes(array):
+    # Flat uint8 view of a contiguous 1-D std140 array, sharing its memory
+    return array.view(np.uint8)
+
+def pack_rockets(state, out=None):
+    # RocketData rows for every RocketState slot, written into `out` when it is given
+    n = state.count
+    rockets = np.zeros(n, dtype=ROCKET_STD140) if out is None else out[:n]
+    rockets['position_radius'][:, :3] = state.pos[:n]
+    rockets['position_radius'][:, 3] = ROCKET_BUFFER_RADIUS
+    rockets['is_active'] = state.active[:n]
+    return rockets
+
+def pack_bullets(bullets, out=None):
+    # BulletData rows for every handed-out BulletStore row; free rows get a zero lifetime
+    n = bullets.count
+    packed = np.zeros(n, dtype=BULLET_STD140) if out is None else out[:n]
+    packed['position_padding'][:, :3] = bullets.pos[:n]
+    packed['velocity'] = bullets.velocity[:n]
+    packed['lifetime'] = np.where(bullets.active[:n], bullets.max_age[:n] - bullets.age[:n], 0.0)
+    return packed
+
+
+# --- Compute Backends ---
+# A backend's dispatch(rockets, bullets, dt, world_radius) runs collision_compute.glsl once
+# over ROCKET_STD140 and BULLET_STD140 arrays, updating both in place.
+class CpuComputeBackend:
+    name = 'cpu'
+
+    def dispatch(self, rockets, bullets, dt, world_radius, bullet_radius=BULLET_RADIUS):
+        # Vectorized over all bullets, in float32 like the kernel. Every bullet sees the rockets
+        # as they were when the dispatch began, so when several bullets hit one rocket in the
+        # same dispatch they all die; on the GPU that race goes whichever way the
+        # atomicExchange calls land.
+        dt, world_radius, bullet_radius = np.float32(dt), np.float32(world_radius), np.float32(bullet_radius)
+        lifetime = bullets['lifetime']
+        idx = np.flatnonzero(lifetime > 0)
+        if idx.size == 0: return
+        lifetime[idx] -= dt
+
+        # Move, reproject onto the sphere and keep the velocity tangent to it
+        velocity = bullets['velocity'][idx]
+        new_pos = bullets['position_padding'][idx, :3] + velocity * dt
+        new_pos_norm = new_pos / np.sqrt((new_pos * new_pos).sum(axis=1, keepdims=True))
+        new_pos = new_pos_norm * (world_radius + np.float32(BULLET_SURFACE_OFFSET))
+        bullets['velocity'][idx] = velocity - new_pos_norm * (velocity * new_pos_norm).sum(axis=1, keepdims=True)
+        bullets['position_padding'][idx, :3] = new_pos
+
+        # First active rocket, in buffer order, whose sphere the bullet is inside
+        live = np.flatnonzero(rockets['is_active'] != 0)
+        if live.size == 0: return
+        centers = rockets['position_radius'][live, :3]
+        reach = rockets['position_radius'][live, 3] + bullet_radius
+        candidates = cKDTree(centers).query_ball_point(new_pos, float(reach.max()))
+        lengths = np.fromiter(map(len, candidates), dtype=np.intp, count=len(candidates))
+        if lengths.sum() == 0: return
+        point = np.repeat(np.arange(idx.size), lengths)
+        rocket = np.concatenate(candidates).astype(np.intp)
+        delta = new_pos[point] - centers[rocket]
+        close = (delta * delta).sum(axis=1) < reach[rocket] * reach[rocket]
+        point, rocket = point[close], live[rocket[close]]
+        order = np.lexsort((rocket, point))
+        point, rocket = point[order], rocket[order]
+        hit_points, first = np.unique(point, return_index=True)
+        lifetime[idx[hit_points]] = 0.0
+        rockets['is_active'][rocket[first]] = 0
+
+
+COMPUTE_BACKENDS = {'cpu': CpuComputeBackend}
+
+def make_compute_backend(name='cpu', *args, **kwargs):
+    return COMPUTE_BACKENDS[name](*args, **kwargs)
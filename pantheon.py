@@ -1,58 +1,37 @@
+import os
 import sys
 import math
-import random
+import time
+import hashlib
+import inspect
+import argparse
+import threading
+
+import numpy as np
 
 from direct.showbase.ShowBase import ShowBase
 from panda3d.core import (
-    Vec3, Point3, LColor, Material,
+    Vec3, LColor, Material,
     AmbientLight, DirectionalLight,
     NodePath, TextNode,
-    GeomVertexFormat, GeomVertexData, Geom, GeomTriangles, GeomPoints, GeomNode, GeomVertexWriter,
-    LineSegs, RenderModeAttrib, BoundingSphere
+    GeomVertexFormat, GeomVertexData, Geom, GeomTriangles, GeomPoints, GeomNode,
+    GeomVertexArrayFormat, InternalName, OmniBoundingVolume,
+    LineSegs, RenderModeAttrib, BoundingSphere,
+    Filename, Loader, LoaderOptions,
+    PStatClient, PStatCollector, Thread,
 )
 from direct.gui.OnscreenText import OnscreenText
 from direct.task import Task
 
+from profiler import FrameProfiler, PHASES, COUNTERS, FRAME_BUDGET_MS
+from replay import Replay, ReplayWriter
+from simulation import (
+    Simulation, SimSnapshot, normalized_rows, orientation_bases,
+    STARTING_WORLD_RADIUS, ROCKET_SCALE, ROCKET_CONE_HEIGHT, ROCKET_CONE_RADIUS, ROCKET_HIT_RADIUS,
+)
+
 # --- Configuration & Constants ---
-STARTING_WORLD_RADIUS = 450.0
-MIN_WORLD_RADIUS = 50.0
-WORLD_SHRINK_SPEED = 0.5
-
-# Time Dilation Settings
-STARTING_ROCKETS = 200
-MIN_TIME_DILATOR = 0.5
-MAX_TIME_DILATOR = 1.0
-
-# Rocket Settings
-ROCKET_FORWARD_SPEED = 45.0
-ROCKET_TURN_SPEED = 55.0
-TURN_RADIUS_DECREASE_PER_KILL = 0.05
-TURN_PENALTY_ON_MISS = 0.01 # Every missed shot increases turn radius
-MIN_SPAWN_SEPARATION = 15.0
-
-# Combat Settings
-BULLET_RADIUS = 0.5
-BULLET_SPEED = 90.0
-BULLET_LIFETIME = 2.0 # This is now the fixed lifetime for all bullets
-SHOOT_COOLDOWN = 0.1
-
-# AI Settings
-AI_OPTIMAL_DISTANCE = 60.0
-AI_SHOOT_RANGE = 100.0 # Increased aggression
-# Targeting constants
-AI_PRIORITY_DISTANCE_WEIGHT = 0.8
-AI_PRIORITY_KILLS_WEIGHT = 0.25
-# Advanced AI Settings
-AI_LEAD_SHOT_ACCURACY = 0.90 # Cosine of angle for firing a predictive shot
-# Ace and Jinking constants
-AI_ACE_CHANCE = 0.00 # 20% chance for an AI to be an "Ace"
-AI_ACE_SPEED_BONUS = 1.1 # 10% faster
-AI_ACE_TURN_BONUS = 1.25 # 25% more agile
-AI_JINK_INTERVAL = 1.5 # How often an AI considers jinking
-AI_JINK_CHANCE = 0.9 # 50% chance to jink when the timer is up
-AI_JINK_DURATION = 0.3 # How long the jink maneuver lasts
-# Hunt Bot settings
-NUM_HUNT_BOTS = 10
+# Simulation rules and balance constants live in simulation.py
 
 # Camera Settings
 CAMERA_CHASE_SPEED = 4.0
@@ -69,310 +48,261 @@ HUNT_BOT_COLOR = LColor(1.0, 0.5, 0.1, 1) # Orange for hunt bots
 BULLET_COLOR = LColor(1.0, 0.8, 0.5, 1)
 TEXT_COLOR = LColor(0.94, 0.94, 0.94, 1)
 WIN_COLOR = LColor(0.2, 1.0, 0.6, 1)
+ROCKET_SHADE = 0.9 # Rocket vertex colors are their kind's color times this
+ACE_MODEL_SCALE = 1.2
 
-# P&L Tracking Constants
-ANTE_COST = 0.25
-KILL_REWARD = 0.20
-WIN_BONUS = 10.00
+# HUD Settings
+HUD_FAST_REFRESH_RATE = 10.0 # Updates per second for fast-changing HUD readouts (speed, turn); None for every frame
 
+# Profiler Settings
+PROFILE_OVERLAY_FRAMES = 60 # Frames the profiler overlay averages over
+PROFILE_OVERLAY_REFRESH = 15 # Frames between overlay text updates
+DEFAULT_PROFILE_PATH = "frame_profile.csv" # Where F4 writes the profiler's ring buffer; .json for JSON
 
-# --- CPU BULLET CLASS ---
-class Bullet:
-    def __init__(self, pos, velocity, shooter, max_age):
-        self.pos = pos
-        self.velocity = velocity
-        self.shooter = shooter
-        self.age = 0.0
-        self.is_active = True
-        self.max_age = max_age
+# Threading
+SIM_TASK_CHAIN = "SimChain" # Task chain whose worker thread runs the simulation's ticks
 
-# --- Procedural Geometry Functions ---
-def create_cone(segments=16, height=2.0, radius=0.7):
-    format = GeomVertexFormat.getV3n3()
-    vdata = GeomVertexData('cone', format, Geom.UHStatic)
-    vwriter, nwriter = GeomVertexWriter(vdata, 'vertex'), GeomVertexWriter(vdata, 'normal')
-    apex, base_center = Point3(0, height / 2, 0), Point3(0, -height / 2, 0)
-    vwriter.addData3f(apex); nwriter.addData3f(Vec3(0, 1, 0).normalized())
-    vwriter.addData3f(base_center); nwriter.addData3f(Vec3(0, -1, 0))
-    for i in range(segments):
-        angle = (i / segments) * 2 * math.pi
-        x, z = math.cos(angle) * radius, math.sin(angle) * radius
-        vwriter.addData3f(x, -height / 2, z); nwriter.addData3f(Vec3(x, radius, z).normalized())
-        vwriter.addData3f(x, -height / 2, z); nwriter.addData3f(0, -1, 0)
-    prim = GeomTriangles(Geom.UHStatic)
-    for i in range(segments):
-        idx0, idx1 = 2 + i * 2, 2 + ((i + 1) % segments) * 2
-        prim.addVertices(0, idx1, idx0)
-        prim.addVertices(1, idx0 + 1, idx1 + 1)
-    geom = Geom(vdata); geom.addPrimitive(prim)
-    node = GeomNode('cone_geom'); node.addGeom(geom)
-    return NodePath(node)
 
-def create_icosphere(subdivisions=2):
-    format = GeomVertexFormat.getV3n3()
-    vdata = GeomVertexData('sphere', format, Geom.UHStatic)
-    vertex_writer, normal_writer = GeomVertexWriter(vdata, 'vertex'), GeomVertexWriter(vdata, 'normal')
-    vertices, triangles = [], []
+# --- Procedural Geometry Functions ---
+def cone_mesh(segments=16, height=2.0, radius=0.7):
+    # Rocket cone (apex along +Y) as arrays: vertices (V, 3), normals (V, 3), triangles (T, 3)
+    angle = np.arange(segments) / segments * 2 * math.pi
+    x, z = np.cos(angle) * radius, np.sin(angle) * radius
+    rim = np.stack([x, np.full(segments, -height / 2), z], axis=1)
+    vertices = np.zeros((2 + 2 * segments, 3))
+    vertices[0], vertices[1] = (0, height / 2, 0), (0, -height / 2, 0)
+    vertices[2::2] = vertices[3::2] = rim
+    normals = np.zeros_like(vertices)
+    normals[0], normals[1] = (0, 1, 0), (0, -1, 0)
+    normals[2::2] = normalized_rows(np.stack([x, np.full(segments, radius), z], axis=1))
+    normals[3::2] = (0, -1, 0)
+    idx0 = 2 + np.arange(segments) * 2
+    idx1 = 2 + (np.arange(segments) + 1) % segments * 2
+    side = np.stack([np.zeros(segments, dtype=int), idx1, idx0], axis=1)
+    base = np.stack([np.ones(segments, dtype=int), idx0 + 1, idx1 + 1], axis=1)
+    return vertices, normals, np.stack([side, base], axis=1).reshape(-1, 3)
+
+def icosphere_mesh(subdivisions=2):
+    # Unit icosphere as arrays: vertices (V, 3) and triangles (T, 3). Each subdivision
+    # splits every triangle in four; shared edge midpoints are found with np.unique.
     t = (1.0 + math.sqrt(5.0)) / 2.0
-    def add_vertex(v): vertices.append(v.normalized()); return len(vertices) - 1
-    add_vertex(Vec3(-1, t, 0)); add_vertex(Vec3(1, t, 0)); add_vertex(Vec3(-1, -t, 0)); add_vertex(Vec3(1, -t, 0))
-    add_vertex(Vec3(0, -1, t)); add_vertex(Vec3(0, 1, t)); add_vertex(Vec3(0, -1, -t)); add_vertex(Vec3(0, 1, -t))
-    add_vertex(Vec3(t, 0, -1)); add_vertex(Vec3(t, 0, 1)); add_vertex(Vec3(-t, 0, -1)); add_vertex(Vec3(-t, 0, 1))
-    triangles = [(0,11,5),(0,5,1),(0,1,7),(0,7,10),(0,10,11),(1,5,9),(5,11,4),(11,10,2),(10,7,6),(7,1,8),
-                 (3,9,4),(3,4,2),(3,2,6),(3,6,8),(3,8,9),(4,9,5),(2,4,11),(6,2,10),(8,6,7),(9,8,1)]
-    midpoint_cache = {}
-    def get_midpoint(p1, p2):
-        key = tuple(sorted((p1, p2)))
-        if key in midpoint_cache: return midpoint_cache[key]
-        midpoint_index = add_vertex((vertices[p1] + vertices[p2]) / 2.0)
-        midpoint_cache[key] = midpoint_index
-        return midpoint_index
+    vertices = normalized_rows(np.array([
+        (-1, t, 0), (1, t, 0), (-1, -t, 0), (1, -t, 0), (0, -1, t), (0, 1, t),
+        (0, -1, -t), (0, 1, -t), (t, 0, -1), (t, 0, 1), (-t, 0, -1), (-t, 0, 1)], dtype=float))
+    triangles = np.array([(0,11,5),(0,5,1),(0,1,7),(0,7,10),(0,10,11),(1,5,9),(5,11,4),(11,10,2),(10,7,6),(7,1,8),
+                          (3,9,4),(3,4,2),(3,2,6),(3,6,8),(3,8,9),(4,9,5),(2,4,11),(6,2,10),(8,6,7),(9,8,1)])
     for _ in range(subdivisions):
-        new_triangles = []
-        for tri in triangles:
-            v1, v2, v3 = tri
-            a, b, c = get_midpoint(v1, v2), get_midpoint(v2, v3), get_midpoint(v3, v1)
-            new_triangles.extend([(v1,a,c), (v2,b,a), (v3,c,b), (a,b,c)])
-        triangles = new_triangles
-    for v in vertices: vertex_writer.addData3f(v); normal_writer.addData3f(v)
+        edges = np.sort(triangles[:, [[0, 1], [1, 2], [2, 0]]], axis=2).reshape(-1, 2)
+        unique_edges, edge_index = np.unique(edges, axis=0, return_inverse=True)
+        midpoints = normalized_rows(vertices[unique_edges[:, 0]] + vertices[unique_edges[:, 1]])
+        a, b, c = (len(vertices) + edge_index.reshape(-1, 3)).T
+        v1, v2, v3 = triangles.T
+        triangles = np.stack([np.stack([v1, a, c], 1), np.stack([v2, b, a], 1),
+                              np.stack([v3, c, b], 1), np.stack([a, b, c], 1)], axis=1).reshape(-1, 3)
+        vertices = np.concatenate([vertices, midpoints])
+    return vertices, triangles
+
+def create_icosphere(subdivisions=2):
+    vertices, triangles = icosphere_mesh(subdivisions)
+    vdata = GeomVertexData('sphere', GeomVertexFormat.getV3n3(), Geom.UHStatic)
+    vdata.setNumRows(len(vertices))
+    # On the unit sphere each vertex is its own normal
+    rows = np.frombuffer(memoryview(vdata.modifyArray(0)), dtype=np.float32).reshape(-1, 6)
+    rows[:, 0:3] = rows[:, 3:6] = vertices
     prim = GeomTriangles(Geom.UHStatic)
-    for tri in triangles:
-        prim.addVertices(tri[0], tri[1], tri[2])
+    prim.setIndexType(Geom.NT_uint32)
+    indices = prim.modifyVertices()
+    indices.setNumRows(triangles.size)
+    np.frombuffer(memoryview(indices), dtype=np.uint32)[:] = triangles.ravel()
     geom = Geom(vdata); geom.addPrimitive(prim)
     node = GeomNode('sphere_geom'); node.addGeom(geom)
     return NodePath(node)
 
+def create_world_grid(num_lat=18, num_lon=36):
+    ls = LineSegs("grid"); ls.setThickness(1.0); ls.setColor(0.2, 0.3, 0.6, 0.8)
+    radius = 1.005
+    # Latitude lines
+    for i in range(1, num_lat):
+        lat = math.pi * i / num_lat - math.pi / 2
+        r = radius * math.cos(lat)
+        z = radius * math.sin(lat)
+        for j in range(num_lon + 1):
+            lon = 2 * math.pi * j / num_lon
+            x = r * math.cos(lon)
+            y = r * math.sin(lon)
+            if j == 0: ls.moveTo(x, y, z)
+            else: ls.drawTo(x, y, z)
+    # Longitude lines
+    for i in range(num_lon):
+        lon = 2 * math.pi * i / num_lon
+        for j in range(num_lat + 1):
+            lat = math.pi * j / num_lat - math.pi / 2
+            r = radius * math.cos(lat)
+            z = radius * math.sin(lat)
+            x = r * math.cos(lon)
+            y = r * math.sin(lon)
+            if j == 0: ls.moveTo(x, y, z)
+            else: ls.drawTo(x, y, z)
+    node = NodePath(ls.create()); node.setLightOff(); return node
+
+# --- Static Mesh Cache ---
+# World meshes never change, so each is built once per process and handed out as cheap
+# copies that share its Geoms. With MESH_CACHE_DIR set (--mesh-cache) they are also saved as
+# .bam files named after their parameters and a hash of the source file defining the
+# builder, so later runs load them instead of rebuilding and any edit to that file, the
+# builder's helpers included, builds them afresh.
+MESH_CACHE_DIR = None # Directory for the .bam files; None disables the disk cache
+_mesh_cache = {}
+_source_hashes = {}
+
+def source_hash(function):
+    # Short hash of the source file that defines `function`
+    path = inspect.getsourcefile(function)
+    if path not in _source_hashes:
+        with open(path, 'rb') as f: _source_hashes[path] = hashlib.sha1(f.read()).hexdigest()[:12]
+    return _source_hashes[path]
+
+def cached_mesh(build, **params):
+    name = build.__name__ + "".join(f"_{key}{value}" for key, value in sorted(params.items()))
+    if name not in _mesh_cache:
+        mesh = None
+        if MESH_CACHE_DIR:
+            path = Filename.fromOsSpecific(os.path.join(MESH_CACHE_DIR, f"{name}_{source_hash(build)}.bam"))
+            if path.exists():
+                node = Loader.getGlobalPtr().loadSync(path, LoaderOptions(LoaderOptions.LF_no_cache))
+                if node: mesh = NodePath(node)
+            if mesh is None:
+                mesh = build(**params)
+                os.makedirs(MESH_CACHE_DIR, exist_ok=True)
+                mesh.writeBamFile(path)
+        else: mesh = build(**params)
+        _mesh_cache[name] = mesh
+    return _mesh_cache[name].copyTo(NodePath())
+
 # --- Helper Functions ---
 def normalized_vector(v):
     return v.normalized() if v.length_squared() > 1e-6 else Vec3(0)
 
-# --- Game Classes ---
-class Rocket(NodePath):
-    def __init__(self, game, pos, is_player=False, is_hunt_bot=False):
-        super().__init__("Rocket")
-        self.game = game
-        self.is_player = is_player
-        self.is_hunt_bot = is_hunt_bot
-        self.is_active = True
-        self.kills = 0
-        self.is_ace = False
-
-        if self.is_player:
-            color = PLAYER_COLOR
-        elif self.is_hunt_bot:
-            color = HUNT_BOT_COLOR
-        else:
-            color = ENEMY_COLOR
-        
-        scale = Vec3(1.5, 2.5, 1.5)
-        self.model = create_cone()
-        self.model.reparentTo(self)
-        self.model.setColor(color)
-        mat = Material(); mat.setAmbient(color*0.5); mat.setDiffuse(color*0.9); mat.setEmission(color*0.2)
-        self.model.setMaterial(mat, 1)
-        self.setScale(scale)
-
-        self.setPos(pos)
-
-        self.speed = ROCKET_FORWARD_SPEED
-        self.base_turn_speed = ROCKET_TURN_SPEED
-        
-        if not self.is_player and not self.is_hunt_bot and random.random() < AI_ACE_CHANCE:
-            self.is_ace = True
-            self.speed *= AI_ACE_SPEED_BONUS
-            self.base_turn_speed *= AI_ACE_TURN_BONUS
-            self.model.setScale(1.2) 
-
-        self.current_turn_speed = self.base_turn_speed
-        self._last_forward = self.calculate_initial_forward()
-        self.velocity = self._last_forward * self.speed
-        self.shoot_timer = 0.0
-        self.target = None
-        self.look_at_sphere_surface()
-
-        self.evade_dir = 1
-        
-        self.jink_timer = random.uniform(0, AI_JINK_INTERVAL)
-        self.jinking_time_left = 0.0
-
-    def register_kill(self):
-        self.kills += 1
-        if TURN_RADIUS_DECREASE_PER_KILL < 1.0:
-            self.current_turn_speed *= (1 / (1 - TURN_RADIUS_DECREASE_PER_KILL))
-        self.speed *= 1.05
-        self.velocity = normalized_vector(self.velocity) * self.speed
-
-    def calculate_initial_forward(self):
-        up = normalized_vector(self.getPos())
-        ref = Vec3(0, 1, 0)
-        if abs(up.dot(ref)) > 0.99: ref = Vec3(1, 0, 0)
-        return normalized_vector(ref.cross(up))
-
-    def look_at_sphere_surface(self, forward_vector=None):
-        up = normalized_vector(self.getPos())
-        if forward_vector is None:
-            forward_vector = self._last_forward if self.velocity.length_squared() < 1e-6 else normalized_vector(self.velocity)
-        forward_vector = (forward_vector - up * forward_vector.dot(up)).normalized()
-        if forward_vector.length_squared() < 1e-6:
-            forward_vector = self.calculate_initial_forward()
-        self._last_forward = forward_vector
-        self.lookAt(self.getPos() + forward_vector, up)
-
-    def update(self, dt):
-        if self.velocity.length_squared() > 0:
-            new_pos = self.getPos() + self.velocity * dt
-            new_pos_norm = normalized_vector(new_pos)
-            self.setPos(new_pos_norm * self.game.current_world_radius)
-            self.velocity -= new_pos_norm * self.velocity.dot(new_pos_norm)
-        self.look_at_sphere_surface()
-        if self.shoot_timer > 0: self.shoot_timer -= dt
-        if not self.is_player:
-            if self.jink_timer > 0: self.jink_timer -= dt
-
-    def shoot(self):
-        # N+1 bullet rule: You can have N kills + 1 bullets out at a time.
-        my_active_bullets = sum(1 for b in self.game.all_bullets if b.shooter == self and b.is_active)
-        max_bullets_allowed = self.kills + 1
-        
-        if my_active_bullets < max_bullets_allowed and self.shoot_timer <= 0:
-            self.shoot_timer = SHOOT_COOLDOWN
-            spawn_pos = self.getPos() + self._last_forward * 4.0
-            self.game.spawn_bullet(spawn_pos, self._last_forward, self)
-            
-            self.speed *= 0.99
-            self.velocity = normalized_vector(self.velocity) * self.speed
-            self.current_turn_speed *= (1.0 - TURN_PENALTY_ON_MISS)
-
-    def control(self, dt):
-        key_map = self.game.key_map
-        turn_value = key_map.get("d", 0) - key_map.get("a", 0)
-        if turn_value != 0:
-            up = normalized_vector(self.getPos())
-            forward = normalized_vector(self.velocity)
-            right = forward.cross(up)
-            turn_force = right * turn_value * self.current_turn_speed
-            self.velocity = normalized_vector(self.velocity + turn_force * dt) * self.speed
-        if key_map.get("space", 0): self.shoot()
-
-    def select_target(self, all_other_rockets):
-        best_target = None
-        highest_priority = -1.0
-        my_pos = self.getPos()
-        if not all_other_rockets: return None
-        
-        for r in all_other_rockets:
-            if not r.is_active: continue
-            dist = (my_pos - r.getPos()).length()
-            priority = AI_PRIORITY_DISTANCE_WEIGHT * (1.0 / (dist + 1.0))
-            priority *= (1.0 + r.kills * AI_PRIORITY_KILLS_WEIGHT)
-            if priority > highest_priority:
-                highest_priority = priority
-                best_target = r
-        return best_target
-
-    def get_intercept_solution(self, target):
-        my_pos = self.getPos()
-        target_pos = target.getPos()
-        target_vel = target.velocity
-        dist = (target_pos - my_pos).length()
-        time_to_impact = dist / BULLET_SPEED
-        for _ in range(3):
-            predicted_pos = target_pos + target_vel * time_to_impact
-            predicted_pos.normalize()
-            predicted_pos *= self.game.current_world_radius
-            dist = (predicted_pos - my_pos).length()
-            time_to_impact = dist / BULLET_SPEED
-        aim_dir = normalized_vector(predicted_pos - my_pos)
-        return aim_dir
-
-    def update_ai(self, dt, all_other_rockets, all_bullets):
-        # --- Hunt Bot Logic ---
-        if self.is_hunt_bot:
-            my_pos = self.getPos()
-            my_forward = normalized_vector(self.velocity)
-            closest_target = None
-            min_dist_sq = float('inf')
-
-            # 1. Find the nearest enemy
-            for r in all_other_rockets:
-                if not r.is_active: continue
-                dist_sq = (my_pos - r.getPos()).length_squared()
-                if dist_sq < min_dist_sq:
-                    min_dist_sq = dist_sq
-                    closest_target = r
-            
-            # 2. Chase and shoot the target
-            if closest_target:
-                # --- Chasing Logic ---
-                up = normalized_vector(my_pos)
-                dir_to_target = (closest_target.getPos() - my_pos)
-                # Project direction onto the sphere's tangent plane
-                final_dir = (dir_to_target - up * dir_to_target.dot(up)).normalized()
-
-                if final_dir.length_squared() > 0:
-                    # Apply a strong turning force towards the target
-                    turn_force = final_dir * self.current_turn_speed
-                    self.velocity = normalized_vector(self.velocity + turn_force * dt) * self.speed
-                
-                # --- Shooting Logic ---
-                # Only shoot if there is a clear shot solution
-                aim_dir = self.get_intercept_solution(closest_target)
-                if my_forward.dot(aim_dir) > AI_LEAD_SHOT_ACCURACY:
-                    self.shoot()
-            return
-
-        # --- Standard AI Logic ---
-        my_pos = self.getPos()
-        my_forward = normalized_vector(self.velocity)
-        up = normalized_vector(my_pos)
-        right = my_forward.cross(up)
-        
-        # 1. OFFENSE: Always be looking for a shot
-        for potential_target in all_other_rockets:
-            if not potential_target.is_active: continue
-            if (potential_target.getPos() - my_pos).length_squared() > AI_SHOOT_RANGE ** 2:
-                continue
-            aim_dir = self.get_intercept_solution(potential_target)
-            if my_forward.dot(aim_dir) > AI_LEAD_SHOT_ACCURACY:
-                self.shoot()
-                break 
-
-        # 2. SURVIVAL/MOVEMENT: Jink or Hunt
-        if self.jinking_time_left > 0:
-            self.jinking_time_left -= dt
-            turn_force = right * self.evade_dir * self.current_turn_speed * 1.5
-            self.velocity = normalized_vector(self.velocity + turn_force * dt) * self.speed
-            return
-
-        if self.jink_timer <= 0:
-            if random.random() < AI_JINK_CHANCE:
-                self.jinking_time_left = AI_JINK_DURATION
-                self.evade_dir = random.choice([-1, 1])
-                self.jink_timer = AI_JINK_INTERVAL
-                return
-            self.jink_timer = AI_JINK_INTERVAL
-
-        # If not jinking, hunt a target
-        if not self.target or not self.target.is_active or random.random() < 0.05:
-            self.target = self.select_target(all_other_rockets)
-
-        if self.target:
-            tail_position = self.target.getPos() - normalized_vector(self.target.velocity) * AI_OPTIMAL_DISTANCE
-            dir_to_tail = (tail_position - my_pos)
-            final_dir = (dir_to_tail - up * dir_to_tail.dot(up)).normalized()
-            if final_dir.length_squared() > 0:
-                self.velocity = normalized_vector(self.velocity + final_dir * self.current_turn_speed * dt) * self.speed
-        else:
-            # If no target, just cruise (jinking will handle evasion)
-            pass
-
-    def destroy(self):
-        self.is_active = False
-        if not self.isEmpty(): self.removeNode()
+def row_vec3(array, index):
+    return Vec3(*array[index].tolist())
+
+# --- Batched Rocket Renderer ---
+# Draws every visible rocket from one dynamic GeomNode, so rockets cost one draw call
+# however many there are. Each frame the cone mesh is transformed by NumPy for the
+# visible rockets only and written straight into the vertex and index buffers.
+# Colors are per vertex with no Material, so lighting uses them for ambient and diffuse.
+def rocket_vertex_format():
+    array = GeomVertexArrayFormat()
+    array.addColumn(InternalName.getVertex(), 3, Geom.NT_float32, Geom.C_point)
+    array.addColumn(InternalName.getNormal(), 3, Geom.NT_float32, Geom.C_normal)
+    array.addColumn(InternalName.getColor(), 4, Geom.NT_float32, Geom.C_color)
+    return GeomVertexFormat.registerFormat(GeomVertexFormat(array))
+
+class RocketBatch:
+    def __init__(self, parent):
+        self.vertices, self.normals, triangles = cone_mesh(height=ROCKET_CONE_HEIGHT, radius=ROCKET_CONE_RADIUS)
+        self.triangles = triangles.astype(np.uint32)
+        self.count = 0 # Rockets the index buffer is built for
+        vdata = GeomVertexData('rockets', rocket_vertex_format(), Geom.UH_dynamic)
+        prim = GeomTriangles(Geom.UH_dynamic)
+        prim.setIndexType(Geom.NT_uint32)
+        geom = Geom(vdata); geom.addPrimitive(prim)
+        node = GeomNode('rocket_batch'); node.addGeom(geom)
+        # Rockets cover the whole sphere; skip recomputing bounds every frame
+        node.setBounds(OmniBoundingVolume()); node.setFinal(True)
+        self.node_path = parent.attachNewNode(node)
+
+    def update(self, pos, forward, scale, colors):
+        # Rebuild the batch for k rockets: pos, tangent headings and per-axis model scale (k, 3), colors (k, 4)
+        k, v = len(pos), len(self.vertices)
+        basis = orientation_bases(pos, forward) # forward comes from RocketState.lerp, already unit and tangent
+        vertices = pos[:, None, :] + (self.vertices[None] * scale[:, None, :]) @ basis
+        normals = normalized_rows(((self.normals[None] / scale[:, None, :]) @ basis).reshape(-1, 3))
+
+        geom = self.node_path.node().modifyGeom(0)
+        vdata = geom.modifyVertexData()
+        vdata.setNumRows(k * v)
+        rows = np.frombuffer(memoryview(vdata.modifyArray(0)), dtype=np.float32).reshape(-1, 10)
+        rows[:, 0:3] = vertices.reshape(-1, 3)
+        rows[:, 3:6] = normals
+        rows[:, 6:10] = np.repeat(colors, v, axis=0)
+        if k != self.count:
+            indices = geom.modifyPrimitive(0).modifyVertices()
+            indices.setNumRows(k * self.triangles.size)
+            offsets = (np.arange(k, dtype=np.uint32) * v)[:, None, None]
+            np.frombuffer(memoryview(indices), dtype=np.uint32)[:] = (self.triangles[None] + offsets).ravel()
+            self.count = k
+
+    def clear(self):
+        empty = np.zeros((0, 3))
+        self.update(empty, empty, empty, np.zeros((0, 4)))
+
+# --- Visibility Pass ---
+# Classifies every rocket and bullet against the camera once per frame, in one batched
+# pass over their concatenated positions. A point is visible when it is above the
+# sphere's horizon as seen from the camera and inside the view frustum, padded by the
+# object's bounding radius. The renderer, the AI LOD scheduler and the HUD read the
+# published `rockets` (per slot) and `bullets` (per bullet row) masks.
+ROCKET_VIEW_RADIUS = ROCKET_HIT_RADIUS * ACE_MODEL_SCALE
+
+class VisibilityPass:
+    def __init__(self):
+        self.rockets = np.zeros(0, dtype=bool)
+        self.bullets = np.zeros(0, dtype=bool)
+
+    def update(self, camera, lens, world_radius, rocket_pos, bullet_pos):
+        points = np.concatenate([rocket_pos, bullet_pos])
+        radius = np.zeros(len(points))
+        radius[:len(rocket_pos)] = ROCKET_VIEW_RADIUS
+        visible = np.ones(len(points), dtype=bool)
+
+        # Sphere Occlusion Culling: beyond the horizon circle seen from the camera
+        cam_pos = np.array(camera.getPos(camera.getTop()))
+        cam_dist = np.sqrt(cam_pos @ cam_pos)
+        if cam_dist > world_radius:
+            visible &= normalized_rows(points) @ (cam_pos / cam_dist) > world_radius / cam_dist
+
+        # View frustum rejection, in camera space (+Y forward, +Z up)
+        if lens is not None:
+            to_camera = camera.getMat(camera.getTop())
+            to_camera.invertInPlace()
+            m = np.array([list(to_camera.getRow(i)) for i in range(4)])
+            local = points @ m[:3, :3] + m[3, :3]
+            x, y, z = local[:, 0], local[:, 1], local[:, 2]
+            half_h, half_v = np.radians(np.array(lens.getFov()) / 2.0)
+            visible &= y > lens.getNear() - radius
+            visible &= np.abs(x) * math.cos(half_h) - y * math.sin(half_h) <= radius
+            visible &= np.abs(z) * math.cos(half_v) - y * math.sin(half_v) <= radius
+
+        self.rockets = visible[:len(rocket_pos)]
+        self.bullets = visible[len(rocket_pos):]
+
+# --- PStats ---
+# Mirrors FrameProfiler laps into PStats collectors under App:Rocket Sphere, and its
+# counters into level collectors, while a PStats server is connected.
+class PStatsSink:
+    def __init__(self):
+        self.client = PStatClient.getGlobalPstats()
+        self.collectors = {name: PStatCollector(f"App:Rocket Sphere:{name}") for name in PHASES}
+        self.levels = {name: PStatCollector(f"Rocket Sphere:{name}") for name in COUNTERS}
+
+    def lap(self, phase, elapsed):
+        # The lap ended just now, so it started `elapsed` seconds ago on the PStats clock
+        if not PStatClient.isConnected(): return
+        now = self.client.getRealTime()
+        thread = Thread.getCurrentThread()
+        collector = self.collectors[phase]
+        collector.start(thread, now - elapsed)
+        collector.stop(thread, now)
+
+    def end_frame(self, counts):
+        if not PStatClient.isConnected(): return
+        for name, value in counts.items(): self.levels[name].setLevel(value)
 
 # --- Main Game Application ---
 class RocketSphere(ShowBase):
-    def __init__(self):
+    def __init__(self, record_dir=None, replay_path=None, profile_path=DEFAULT_PROFILE_PATH, threaded_sim=True,
+                 hud_refresh_rate=HUD_FAST_REFRESH_RATE, log_rounds=False):
         ShowBase.__init__(self)
         self.setBackgroundColor(BACKGROUND_COLOR)
         self.setup_lights()
@@ -380,24 +310,51 @@ class RocketSphere(ShowBase):
 
         self.game_active = False
         self.ui_elements = {}
-        self.player_ref = None
-        self.all_rockets = []
-        self.all_bullets = []
+        self.ui_shown = {} # Per element: the text and color it last rendered, and when
+        self.hud_refresh_interval = 1.0 / hud_refresh_rate if hud_refresh_rate else 0.0
+        self.sim = None
+        self.view = None # SimSnapshot being drawn this frame
+        self.ai_visible = None # Rockets the last frame drew, handed to the sim at the sync point
+        self.rocket_batch = RocketBatch(self.render)
+        self.visibility = VisibilityPass()
+        self.rocket_colors = self.rocket_scales = None # Per slot, fixed for the round
         
         self.zoom_level = MAX_ZOOM
-        self.time_dilator = 1.0
         
         self.bullet_vdata = None
         self.bullet_geom_node = None
+        self.bullet_buffer = np.zeros((256, 3), dtype=np.float32) # Visible bullet positions, doubled when full
         
         self.current_world_radius = STARTING_WORLD_RADIUS
 
         self.total_pnl = 0.0
-        self.round_pnl = 0.0
 
-        self.show_title_screen()
+        self.record_dir = record_dir # Write a replay of every round here when set
+        self.replay_writer = None
+        self.replay = None
+        self.replay_position = 0.0 # Fractional tick being shown
+        self.replay_speed = 1.0
+        self.replay_paused = False
+
+        self.profiler = FrameProfiler(sink=PStatsSink())
+        self.profile_path = profile_path
+        self.profile_overlay = False
+        self.log_rounds = log_rounds # Print each round's length and bullet pool high-water marks when it ends
+
+        # Simulation ticks run on a worker thread when Panda3D has true threads
+        self.threaded_sim = threaded_sim and Thread.isTrueThreads()
+        if self.threaded_sim: self.taskMgr.setupTaskChain(SIM_TASK_CHAIN, numThreads=1, frameSync=False)
+        self.sim_idle = threading.Event(); self.sim_idle.set()
+        self.sim_error = None
+
         self.accept("escape", sys.exit)
         self.accept("r", self.restart_game)
+        self.accept("f3", self.toggle_profile_overlay)
+        self.accept("f4", self.export_profile)
+        if replay_path:
+            self.start_replay(Replay(replay_path))
+        else:
+            self.show_title_screen()
 
     def setup_lights(self):
         ambient = AmbientLight("ambient"); ambient.setColor(LColor(0.5, 0.5, 0.6, 1))
@@ -414,9 +371,10 @@ class RocketSphere(ShowBase):
             self.accept(f"{key}-up", self.set_key, [key, 0])
 
     def setup_cpu_simulation(self):
-        vformat = GeomVertexFormat.get_v3c4()
+        # Position-only points; the color is a flat render attribute, not a vertex column
+        vformat = GeomVertexFormat.get_v3()
         self.bullet_vdata = GeomVertexData("bullets", vformat, Geom.UH_dynamic)
-        prim = GeomPoints(Geom.UH_static)
+        prim = GeomPoints(Geom.UH_dynamic)
         geom = Geom(self.bullet_vdata)
         geom.addPrimitive(prim)
         node = GeomNode('bullet_geom')
@@ -433,97 +391,72 @@ class RocketSphere(ShowBase):
 
     def restart_game(self):
         self.taskMgr.remove("TitleScreenUpdate")
+        self.taskMgr.remove("ReplayLoop")
         if self.game_active: self.taskMgr.remove("GameLoop")
         self.start_game()
 
-    def generate_spawn_points(self, num_points):
-        points = []
-        phi = math.pi * (3. - math.sqrt(5.))
-        for i in range(num_points):
-            y = 1 - (i / float(num_points - 1)) * 2
-            radius = math.sqrt(1 - y * y)
-            theta = phi * i
-            x = math.cos(theta) * radius
-            z = math.sin(theta) * radius
-            points.append(Point3(x, y, z) * STARTING_WORLD_RADIUS)
-        return points
-
     def start_game(self):
         self.cleanup_game()
         self.clear_ui()
 
-        self.round_pnl = -ANTE_COST
-        
-        self.current_world_radius = STARTING_WORLD_RADIUS
+        self.sim = Simulation()
+        self.sim.profiler = self.profiler
+        if self.record_dir:
+            os.makedirs(self.record_dir, exist_ok=True)
+            path = os.path.join(self.record_dir, time.strftime("round_%Y%m%d_%H%M%S.rsr"))
+            self.sim.recorder = self.replay_writer = ReplayWriter(path, self.sim)
+        self.take_snapshot()
+        self.current_world_radius = self.sim.world_radius
         self.create_world()
         self.setup_cpu_simulation()
-        
-        spawn_points = self.generate_spawn_points(STARTING_ROCKETS)
-        random.shuffle(spawn_points)
-
-        for i in range(STARTING_ROCKETS):
-            is_player = (i == 0)
-            # The first NUM_HUNT_BOTS AIs (i=1 to NUM_HUNT_BOTS) will be hunt bots
-            is_hunt_bot = not is_player and (i <= NUM_HUNT_BOTS)
-            pos = spawn_points.pop()
-            rocket = Rocket(self, pos, is_player=is_player, is_hunt_bot=is_hunt_bot)
-            self.all_rockets.append(rocket)
-            if is_player:
-                self.player_ref = rocket
-            rocket.reparentTo(self.render)
+
+        self.setup_rocket_appearance()
 
         self.setup_camera()
         self.game_active = True
         self.taskMgr.add(self.game_loop, "GameLoop")
 
     def cleanup_game(self):
-        for r in self.all_rockets: r.destroy()
-        self.all_rockets, self.player_ref = [], None
-        self.all_bullets = []
+        self.sync_sim()
+        self.ai_visible = None
+        self.close_recorder()
+        self.replay = None
+        self.rocket_batch.clear()
         if hasattr(self, 'world_sphere'): self.world_sphere.removeNode()
         if self.bullet_geom_node: self.bullet_geom_node.removeNode()
         self.bullet_geom_node = None
         self.bullet_vdata = None
 
     def create_world(self):
-        self.world_sphere = create_icosphere(subdivisions=5)
+        self.world_sphere = cached_mesh(create_icosphere, subdivisions=5)
         self.world_sphere.setScale(self.current_world_radius)
         mat = Material(); base_color = LColor(0.1, 0.15, 0.3, 1)
         mat.setAmbient(base_color * 0.6); mat.setDiffuse(base_color * 0.9)
         self.world_sphere.setMaterial(mat, 1); self.world_sphere.reparentTo(self.render)
-        self._create_world_grid().reparentTo(self.world_sphere)
-
-    def _create_world_grid(self, num_lat=18, num_lon=36):
-        ls = LineSegs("grid"); ls.setThickness(1.0); ls.setColor(0.2, 0.3, 0.6, 0.8)
-        radius = 1.005
-        # Latitude lines
-        for i in range(1, num_lat):
-            lat = math.pi * i / num_lat - math.pi / 2
-            r = radius * math.cos(lat)
-            z = radius * math.sin(lat)
-            for j in range(num_lon + 1):
-                lon = 2 * math.pi * j / num_lon
-                x = r * math.cos(lon)
-                y = r * math.sin(lon)
-                if j == 0: ls.moveTo(x, y, z)
-                else: ls.drawTo(x, y, z)
-        # Longitude lines
-        for i in range(num_lon):
-            lon = 2 * math.pi * i / num_lon
-            for j in range(num_lat + 1):
-                lat = math.pi * j / num_lat - math.pi / 2
-                r = radius * math.cos(lat)
-                z = radius * math.sin(lat)
-                x = r * math.cos(lon)
-                y = r * math.sin(lon)
-                if j == 0: ls.moveTo(x, y, z)
-                else: ls.drawTo(x, y, z)
-        node = NodePath(ls.create()); node.setLightOff(); return node
+        cached_mesh(create_world_grid, num_lat=18, num_lon=36).reparentTo(self.world_sphere)
+
+    def setup_rocket_appearance(self):
+        state = self.sim.state
+        n = state.count
+        colors = np.empty((n, 4), dtype=np.float32)
+        colors[:] = ENEMY_COLOR
+        colors[state.is_hunt_bot[:n]] = HUNT_BOT_COLOR
+        colors[state.is_player[:n]] = PLAYER_COLOR
+        colors[:, :3] *= ROCKET_SHADE
+        self.rocket_colors = colors
+        self.rocket_scales = np.tile(ROCKET_SCALE, (n, 1))
+        self.rocket_scales[state.is_ace[:n]] *= ACE_MODEL_SCALE
+
+    def player_alive(self):
+        return self.view is not None and self.view.player_alive
+
+    def player_pos(self):
+        return row_vec3(self.view.pos, self.view.player)
 
     def setup_camera(self):
         self.disableMouse()
-        if self.player_ref:
-            self.camera.setPos(self.player_ref.getPos() + normalized_vector(self.player_ref.getPos()) * self.zoom_level)
+        if self.player_alive():
+            self.camera.setPos(self.player_pos() + normalized_vector(self.player_pos()) * self.zoom_level)
             self.update_camera(0.1)
 
     def handle_zoom(self, dt):
@@ -532,204 +465,137 @@ class RocketSphere(ShowBase):
         self.zoom_level = max(MIN_ZOOM, min(self.zoom_level, MAX_ZOOM))
 
     def update_camera(self, dt):
-        if not self.player_ref or not self.player_ref.is_active: return
-        rocket_pos = self.player_ref.getPos()
+        if not self.player_alive(): return
+        rocket_pos = self.player_pos()
         up_vec = normalized_vector(rocket_pos)
         target_pos = rocket_pos + up_vec * self.zoom_level
         current_pos = self.camera.getPos()
         interp_factor = 1.0 - math.exp(-dt * CAMERA_CHASE_SPEED)
         new_pos = current_pos + (target_pos - current_pos) * interp_factor
         self.camera.setPos(new_pos)
-        forward_vec = normalized_vector(self.player_ref.velocity) or self.player_ref._last_forward
-        self.camera.lookAt(self.player_ref.getPos(), forward_vec)
-
-    def update_time_dilator(self):
-        start_count = STARTING_ROCKETS; end_count = 2
-        rocket_range = float(start_count - end_count)
-        if rocket_range <= 0: self.time_dilator = 1.0; return
-        current_rockets = len(self.all_rockets)
-        progress = (start_count - current_rockets) / rocket_range
-        progress = max(0.0, min(1.0, progress))
-        eased_progress = progress ** 2
-        time_range = MAX_TIME_DILATOR - MIN_TIME_DILATOR
-        self.time_dilator = MIN_TIME_DILATOR + (eased_progress * time_range)
-
-    def update_bullets_cpu(self, dt):
-        rockets_to_destroy = set()
-        for bullet in self.all_bullets:
-            if not bullet.is_active: continue
-            bullet.age += dt
-            if bullet.age > bullet.max_age:
-                bullet.is_active = False
-                continue
-            new_pos = bullet.pos + bullet.velocity * dt
-            new_pos_norm = normalized_vector(new_pos)
-            bullet.pos = new_pos_norm * self.current_world_radius
-            bullet.velocity -= new_pos_norm * bullet.velocity.dot(new_pos_norm)
-            for rocket in self.all_rockets:
-                if not rocket.is_active or rocket == bullet.shooter: continue
-
-                # --- Cone Collision Detection ---
-                # Transform bullet's world position to the rocket's local space.
-                bullet_local_pos = rocket.getRelativePoint(self.render, bullet.pos)
-
-                # Define the cone's properties based on its original model dimensions
-                cone_height = 2.0
-                cone_radius = 0.7
-                apex_y = cone_height / 2.0
-                base_y = -cone_height / 2.0
-
-                # Unpack bullet's local coordinates for clarity
-                bx, by, bz = bullet_local_pos.x, bullet_local_pos.y, bullet_local_pos.z
-
-                # 1. Check if the bullet is within the height-range of the cone
-                if not (base_y <= by <= apex_y):
-                    continue
-
-                # 2. Calculate the cone's radius at the bullet's y-position
-                interp_factor = (apex_y - by) / cone_height
-                radius_at_y = cone_radius * (1.0 - interp_factor)
-                
-                # 3. Calculate the bullet's squared distance from the cone's central axis (the Y-axis)
-                dist_sq_from_axis = bx * bx + bz * bz
-
-                # 4. Check for collision, adding the bullet's radius to the cone's radius at that point
-                total_radius = radius_at_y + BULLET_RADIUS
-                if dist_sq_from_axis < total_radius * total_radius:
-                    rockets_to_destroy.add(rocket)
-                    bullet.is_active = False
-                    if bullet.shooter and bullet.shooter.is_active:
-                        bullet.shooter.register_kill()
-                        if bullet.shooter.is_player:
-                            self.round_pnl += KILL_REWARD
-                    break 
-
-        self.all_bullets = [b for b in self.all_bullets if b.is_active]
-        for rocket in rockets_to_destroy:
-            rocket.is_active = False
-
-    def update_bullet_geom(self):
+        forward_vec = normalized_vector(Vec3(*self.view.player_velocity))
+        if forward_vec.length_squared() == 0: forward_vec = row_vec3(self.view.forward, self.view.player)
+        self.camera.lookAt(rocket_pos, forward_vec)
+
+    def update_bullet_geom(self, visible_bullets):
         if not self.bullet_geom_node or self.bullet_geom_node.is_empty(): return
-        
-        visible_bullets = []
-        cam_pos = self.camera.getPos()
-        cam_dist = cam_pos.length()
-        
-        perform_sphere_cull = cam_dist > self.current_world_radius
-        if perform_sphere_cull:
-            visibility_cosine_threshold = self.current_world_radius / cam_dist
-            cam_norm = cam_pos / cam_dist
-
-        for bullet in self.all_bullets:
-            # Sphere Occlusion Culling
-            if perform_sphere_cull:
-                bullet_norm = bullet.pos.normalized()
-                angle_cosine = cam_norm.dot(bullet_norm)
-                if angle_cosine <= visibility_cosine_threshold:
-                    continue # Occluded by sphere, skip
-            
-            # If we reach here, the bullet is visible
-            visible_bullets.append(bullet)
-
-        vdata = self.bullet_geom_node.node().modifyGeom(0).modifyVertexData()
-        vdata.setNumRows(len(visible_bullets))
-        vertex_writer = GeomVertexWriter(vdata, 'vertex')
-        color_writer = GeomVertexWriter(vdata, 'color')
-        for bullet in visible_bullets:
-            vertex_writer.setData3(bullet.pos)
-            color_writer.setData4(BULLET_COLOR)
-        prim = self.bullet_geom_node.node().modifyGeom(0).modifyPrimitive(0)
-        prim.clearVertices()
-        prim.addConsecutiveVertices(0, len(visible_bullets))
-
-    def update_world_shrink(self, dt):
-        rocket_range = float(STARTING_ROCKETS - 2)
-        if rocket_range <= 0: target_radius = MIN_WORLD_RADIUS
-        else:
-            progress = max(0.0, min(1.0, (len(self.all_rockets) - 2) / rocket_range))
-            radius_range = STARTING_WORLD_RADIUS - MIN_WORLD_RADIUS
-            target_radius = MIN_WORLD_RADIUS + (progress * radius_range)
-        interp_factor = 1.0 - math.exp(-dt * WORLD_SHRINK_SPEED)
-        self.current_world_radius += (target_radius - self.current_world_radius) * interp_factor
-        self.world_sphere.setScale(self.current_world_radius)
-        
+
+        count = len(visible_bullets)
+        if count > len(self.bullet_buffer):
+            capacity = len(self.bullet_buffer)
+            while capacity < count: capacity *= 2
+            self.bullet_buffer = np.zeros((capacity, 3), dtype=np.float32)
+        self.bullet_buffer[:count] = visible_bullets
+
+        # One copy of the packed float32 rows into the vertex array, and a non-indexed
+        # primitive that only needs its vertex count updated
+        geom = self.bullet_geom_node.node().modifyGeom(0)
+        vdata = geom.modifyVertexData()
+        vdata.setNumRows(count)
+        np.frombuffer(memoryview(vdata.modifyArray(0)), dtype=np.float32)[:] = self.bullet_buffer[:count].ravel()
+        geom.modifyPrimitive(0).setNonindexedVertices(0, count)
+
     def game_loop(self, task):
         if not self.game_active: return Task.done
-        self.update_time_dilator()
-        self.update_world_shrink(globalClock.getDt())
-        dt = min(globalClock.getDt() * self.time_dilator, 1/30.0)
-        
-        # --- Culling Setup ---
-        cam_pos = self.camera.getPos()
-        cam_dist = cam_pos.length()
-
-        perform_sphere_cull = cam_dist > self.current_world_radius
-        if perform_sphere_cull:
-            visibility_cosine_threshold = self.current_world_radius / cam_dist
-            cam_norm = cam_pos / cam_dist
-        
-        # --- Rocket Visibility Update ---
-        for rocket in self.all_rockets:
-            is_visible = True # Default to visible
-
-            # Sphere Occlusion Culling
-            if perform_sphere_cull and rocket != self.player_ref:
-                rocket_norm = rocket.getPos().normalized()
-                angle_cosine = cam_norm.dot(rocket_norm)
-                if angle_cosine <= visibility_cosine_threshold:
-                    is_visible = False
-            
-            # Apply visibility
-            if is_visible:
-                if rocket.isHidden(): rocket.show()
-            else:
-                if not rocket.isHidden(): rocket.hide()
-
-        # --- Rocket Logic Update ---
-        for rocket in self.all_rockets:
-            if rocket.is_player:
-                rocket.control(dt)
-            else:
-                other_rockets = [r for r in self.all_rockets if r != rocket]
-                rocket.update_ai(dt, other_rockets, self.all_bullets)
-            
-            rocket.update(dt)
-        
-        self.update_bullets_cpu(dt)
-        self.update_bullet_geom()
-
-        rockets_to_remove = [r for r in self.all_rockets if not r.is_active]
-        if rockets_to_remove:
-            self.all_rockets = [r for r in self.all_rockets if r.is_active]
-            for r in rockets_to_remove: r.destroy()
-            
-        self.handle_zoom(dt)
-        self.update_camera(dt)
+
+        # --- Sync Point ---
+        # The ticks started last frame finish here, which also ends that frame's profile. With
+        # the Simulation idle, this frame snapshots it to draw from, hands it the input and the
+        # last frame's visibility, and starts the next ticks before rendering the snapshot.
+        prof = self.profiler
+        prof.begin_thread() # Only the wait is 'sync'; Panda3D's own render since the last lap is left out
+        self.sync_sim()
+        prof.lap('sync')
+        prof.end_frame()
+        self.update_profile_overlay()
+
+        # --- Fixed-Step Simulation ---
+        # The sim runs whole ticks at its own rate; rendering interpolates between the last two
+        dt = globalClock.getDt()
+        prof.begin_frame(dt)
+        self.take_snapshot()
+        if self.view.result is None: self.start_sim_ticks(dt)
+        self.render_frame(dt)
         self.update_game_ui()
-        
-        if self.game_active:
-            is_player_alive = self.player_ref and self.player_ref.is_active
-            if not is_player_alive: self.handle_game_over()
-            elif len(self.all_rockets) == 1 and self.all_rockets[0].is_player: self.handle_game_won()
-            
+
+        if self.view.result == 'lost': self.handle_game_over()
+        elif self.view.result == 'won': self.handle_game_won()
+        prof.lap('ui')
         return Task.cont
 
-    def spawn_bullet(self, pos, direction, shooter):
-        vel = direction * BULLET_SPEED
-        max_age = BULLET_LIFETIME 
-        bullet = Bullet(pos, vel, shooter, max_age)
-        self.all_bullets.append(bullet)
+    # --- Simulation Thread ---
+    # Between start_sim_ticks() and sync_sim() the Simulation belongs to the sim task chain's
+    # worker thread; the main thread only reads the snapshot taken before the ticks started.
+    def take_snapshot(self):
+        self.view = SimSnapshot(self.sim)
+        self.sim.ai_visible = self.ai_visible # Hidden rockets drop to a coarser AI tier
+        self.profiler.lap('interpolate')
+
+    def start_sim_ticks(self, dt):
+        # Run the ticks this frame owes on the sim task chain, or right here without one
+        turn = self.key_map.get("d", 0) - self.key_map.get("a", 0)
+        args = [dt, turn, bool(self.key_map.get("space", 0))]
+        if not self.threaded_sim: return self.run_sim_ticks(*args)
+        self.sim_idle.clear()
+        self.taskMgr.add(self.run_sim_ticks, "SimTicks", taskChain=SIM_TASK_CHAIN, extraArgs=args)
+
+    def run_sim_ticks(self, dt, turn, shoot):
+        try:
+            self.profiler.begin_thread()
+            self.sim.advance(dt, turn=turn, shoot=shoot)
+        except Exception as error:
+            self.sim_error = error # Panda3D only logs errors in threaded tasks; sync_sim raises it
+        finally:
+            self.sim_idle.set()
+        return Task.done
+
+    def sync_sim(self):
+        # Wait for the running ticks, if any, and raise what they raised
+        self.sim_idle.wait()
+        error, self.sim_error = self.sim_error, None
+        if error: raise error
+
+    def render_frame(self, dt):
+        # Draw the current snapshot, interpolated by the sim's alpha, from this frame's camera
+        prof = self.profiler
+        view = self.view
+        self.current_world_radius = view.world_radius
+        self.world_sphere.setScale(self.current_world_radius)
+
+        self.handle_zoom(dt)
+        self.update_camera(dt)
+        prof.lap('camera')
+
+        # --- Visibility ---
+        # One pass for rockets and bullets against this frame's camera
+        self.visibility.update(self.camera, self.camLens, self.current_world_radius, view.pos, view.bullet_pos)
+        visible = self.visibility.rockets & view.active
+        visible[view.player] = view.active[view.player] # The player is always drawn
+        self.ai_visible = visible
+        visible_bullets = view.bullet_pos[self.visibility.bullets]
+        prof.lap('visibility')
+        prof.count('visible_rockets', np.count_nonzero(visible))
+        prof.count('visible_bullets', len(visible_bullets))
+
+        # Hidden rockets and bullets are compacted out rather than hidden node by node
+        self.rocket_batch.update(view.pos[visible], view.forward[visible],
+                                 self.rocket_scales[visible], self.rocket_colors[visible])
+        prof.lap('rocket_geom')
+        self.update_bullet_geom(visible_bullets)
+        prof.lap('bullet_geom')
 
     def handle_game_over(self):
         if not self.game_active: return
-        self.game_active = False; self.taskMgr.remove("GameLoop"); self.player_ref = None
+        self.game_active = False; self.taskMgr.remove("GameLoop")
+        self.log_round_stats()
         
-        self.total_pnl += self.round_pnl
+        round_pnl = self.sim.round_pnl
+        self.total_pnl += round_pnl
 
         self.update_ui_text("GameOver", "GAME OVER", (0, 0.2), 0.15, align=TextNode.ACenter, color=ENEMY_COLOR)
 
-        round_pnl_text = f"Round P&L: ${self.round_pnl:+.2f}"
-        round_pnl_color = WIN_COLOR if self.round_pnl > 0 else ENEMY_COLOR
+        round_pnl_text = f"Round P&L: ${round_pnl:+.2f}"
+        round_pnl_color = WIN_COLOR if round_pnl > 0 else ENEMY_COLOR
         self.update_ui_text("RoundPnlResult", round_pnl_text, (0, 0.05), 0.07, color=round_pnl_color)
 
         self.update_ui_text("RestartPrompt", "Press R to Restart", (0, -0.1), 0.07)
@@ -737,31 +603,134 @@ class RocketSphere(ShowBase):
     def handle_game_won(self):
         if not self.game_active: return
         self.game_active = False; self.taskMgr.remove("GameLoop")
+        self.log_round_stats()
         
-        self.round_pnl += WIN_BONUS
-        self.total_pnl += self.round_pnl
+        # The simulation has already added WIN_BONUS to the round
+        round_pnl = self.sim.round_pnl
+        self.total_pnl += round_pnl
         
         self.update_ui_text("GameWon", "YOU ARE THE LAST ONE STANDING", (0, 0.2), 0.1, align=TextNode.ACenter, color=WIN_COLOR)
         
-        round_pnl_text = f"Round P&L: ${self.round_pnl:+.2f}"
-        round_pnl_color = WIN_COLOR if self.round_pnl > 0 else ENEMY_COLOR
+        round_pnl_text = f"Round P&L: ${round_pnl:+.2f}"
+        round_pnl_color = WIN_COLOR if round_pnl > 0 else ENEMY_COLOR
         self.update_ui_text("RoundPnlResult", round_pnl_text, (0, 0.05), 0.07, color=round_pnl_color)
 
         self.update_ui_text("RestartPrompt", "Press R to Play Again", (0, -0.1), 0.07)
 
+    def close_recorder(self):
+        if self.replay_writer:
+            self.replay_writer.close()
+            print(f"Replay saved to {self.replay_writer.file.name}")
+        self.replay_writer = None
+
+    # --- Replay Playback ---
+    # Plays a recorded round back through the normal renderer. The replay is restored into
+    # a Simulation that is never stepped, so the scene, camera and HUD code are shared.
+    # P pauses, [ and ] halve and double the speed, \ reverses and 0-9 seek to 0-90%.
+    def start_replay(self, replay):
+        self.taskMgr.remove("TitleScreenUpdate")
+        self.cleanup_game()
+        self.clear_ui()
+        self.replay = replay
+        self.sim = Simulation(num_rockets=replay.num_rockets)
+        replay.setup(self.sim)
+        self.replay_position, self.replay_speed, self.replay_paused = 0.0, 1.0, False
+        replay.restore(self.sim, 0.0)
+        self.take_snapshot()
+        self.current_world_radius = self.sim.world_radius
+        self.create_world()
+        self.setup_cpu_simulation()
+        self.setup_rocket_appearance()
+        self.setup_camera()
+
+        self.accept("p", self.toggle_replay_pause)
+        self.accept("[", self.set_replay_speed, [0.5])
+        self.accept("]", self.set_replay_speed, [2.0])
+        self.accept("\\", self.set_replay_speed, [-1.0])
+        for digit in range(10):
+            self.accept(str(digit), self.seek_replay, [digit / 10.0])
+        self.game_active = True
+        self.taskMgr.add(self.replay_loop, "ReplayLoop")
+
+    def toggle_replay_pause(self):
+        self.replay_paused = not self.replay_paused
+
+    def set_replay_speed(self, factor):
+        self.replay_speed *= factor
+
+    def seek_replay(self, fraction):
+        if self.replay: self.replay_position = fraction * (len(self.replay) - 1)
+
+    def replay_loop(self, task):
+        if not self.replay: return Task.done
+        dt = globalClock.getDt()
+        self.profiler.begin_frame(dt)
+        if not self.replay_paused:
+            # Speed 1 replays at the pace the round was played, time dilation included
+            self.replay_position += dt * self.view.time_dilator / self.replay.tick_dt * self.replay_speed
+            self.replay_position = min(max(self.replay_position, 0.0), len(self.replay) - 1.0)
+        self.replay.restore(self.sim, self.replay_position)
+        self.profiler.lap('restore')
+        self.take_snapshot()
+        self.render_frame(dt)
+        self.update_game_ui()
+        status = "PAUSED" if self.replay_paused else f"x{self.replay_speed:g}"
+        self.update_ui_text("Replay", f"REPLAY  tick {self.view.tick}/{len(self.replay) - 1}  {status}", (0, -0.9), 0.05)
+        self.profiler.lap('ui')
+        self.profiler.end_frame()
+        self.update_profile_overlay()
+        return Task.cont
+
+    # --- Profiling ---
+    def toggle_profile_overlay(self):
+        self.profile_overlay = not self.profile_overlay
+        if not self.profile_overlay: self.remove_ui_text("Profile")
+        self.update_profile_overlay(force=True)
+
+    def update_profile_overlay(self, force=False):
+        # Mean and worst time per phase over the last PROFILE_OVERLAY_FRAMES frames; the
+        # text is only rebuilt every PROFILE_OVERLAY_REFRESH frames
+        if not self.profile_overlay: return
+        if not force and self.profiler.frames_recorded % PROFILE_OVERLAY_REFRESH: return
+        summary = self.profiler.summary(PROFILE_OVERLAY_FRAMES)
+        if summary is None: return
+        phases = summary['phases']
+        worst = max(phases, key=lambda name: phases[name][0])
+        lines = [f"frame {summary['frame_dt']:5.1f} ms  cpu {summary['total'][0]:5.2f} ms (max {summary['total'][1]:.2f})",
+                 f"over {FRAME_BUDGET_MS:.1f} ms budget: {summary['over_budget']}/{summary['frames']} frames"]
+        lines += [f"{'>' if name == worst else ' '} {name:<12}{mean:6.2f}  max {peak:6.2f}"
+                  for name, (mean, peak) in phases.items() if peak > 0]
+        counts = summary['counts']
+        lines.append(f"ticks {counts['ticks']:.1f}  rockets {counts['alive_rockets']:.0f} ({counts['visible_rockets']:.0f} shown)  "
+                     f"bullets {counts['live_bullets']:.0f} ({counts['visible_bullets']:.0f} shown)")
+        lines.append(f"thinkers {counts['thinkers']:.0f}  collision pairs {counts['pairs']:.0f}")
+        self.update_ui_text("Profile", "\n".join(lines), (-1.3, 0.75), 0.035, align=TextNode.ALeft)
+
+    def export_profile(self):
+        self.profiler.export(self.profile_path)
+        print(f"Wrote {self.profiler.frames_kept} profiled frames to {self.profile_path}")
+
+    def log_round_stats(self):
+        self.close_recorder()
+        if not self.log_rounds: return
+        stats = self.sim.bullets.stats()
+        print(f"Round over after {self.sim.tick} ticks. Bullet pool: peak {stats['high_water']} live "
+              f"/ {stats['high_water_rows']} rows of {stats['capacity']} slots")
+
     def update_game_ui(self):
         if not self.game_active: return
-        is_player_alive = self.player_ref and self.player_ref.is_active
+        is_player_alive = self.player_alive()
+        view = self.view
         
         # Player specific stats
         if is_player_alive:
-            player_kills = self.player_ref.kills
+            player_kills = view.player_kills
             max_bullets = player_kills + 1
-            active_bullets = sum(1 for b in self.all_bullets if b.shooter == self.player_ref and b.is_active)
+            active_bullets = view.player_bullets
             ammo_text = f"Ammo: {active_bullets}/{max_bullets}"
             kills_text = f"Kills: {player_kills}"
-            player_speed = self.player_ref.speed
-            player_turn_speed = self.player_ref.current_turn_speed
+            player_speed = view.player_speed
+            player_turn_speed = view.player_turn_speed
             health_text = "Hull Integrity: 100%"
         else:
             ammo_text = "Ammo: N/A"
@@ -770,7 +739,10 @@ class RocketSphere(ShowBase):
             player_turn_speed = 0
             health_text = "Hull Integrity: BREACHED"
 
-        rockets_left_text = f"Rockets Left: {len(self.all_rockets)}"
+        # Speed and turn readouts change every tick; a dead player's final zeros go up at once
+        fast_interval = self.hud_refresh_interval if is_player_alive else 0.0
+        rockets_left_text = f"Rockets Left: {view.alive_count}"
+        in_view_text = f"In View: {np.count_nonzero(self.ai_visible)}"
         speed_text = f"Speed: {player_speed:.1f}"
         turn_speed_text = f"Turn: {player_turn_speed:.1f}"
 
@@ -780,20 +752,22 @@ class RocketSphere(ShowBase):
 
         # Top-right UI
         self.update_ui_text("Enemies", rockets_left_text, (1.3, 0.9), 0.05, align=TextNode.ARight)
+        self.update_ui_text("InView", in_view_text, (1.3, 0.85), 0.05, align=TextNode.ARight)
 
         # Bottom-left UI
         self.update_ui_text("Ammo", ammo_text, (-1.3, -0.85), 0.05, align=TextNode.ALeft)
-        self.update_ui_text("PlayerSpeed", speed_text, (-1.3, -0.9), 0.05, align=TextNode.ALeft)
+        self.update_ui_text("PlayerSpeed", speed_text, (-1.3, -0.9), 0.05, align=TextNode.ALeft, interval=fast_interval)
         
         # Bottom-right UI
-        self.update_ui_text("TurnSpeed", turn_speed_text, (1.3, -0.9), 0.05, align=TextNode.ARight)
+        self.update_ui_text("TurnSpeed", turn_speed_text, (1.3, -0.9), 0.05, align=TextNode.ARight, interval=fast_interval)
 
         # Center top UI (P&L)
+        round_pnl = view.round_pnl
         total_pnl_color = WIN_COLOR if self.total_pnl >= 0 else ENEMY_COLOR
-        self.update_ui_text("TotalPnl", f"Total P&L: ${self.total_pnl + self.round_pnl:+.2f}", (0, 0.9), 0.05, color=total_pnl_color)
+        self.update_ui_text("TotalPnl", f"Total P&L: ${self.total_pnl + round_pnl:+.2f}", (0, 0.9), 0.05, color=total_pnl_color)
         
-        round_pnl_color = WIN_COLOR if self.round_pnl >= 0 else ENEMY_COLOR
-        self.update_ui_text("RoundPnl", f"Round P&L: ${self.round_pnl:+.2f}", (0, 0.8), 0.05, color=round_pnl_color)
+        round_pnl_color = WIN_COLOR if round_pnl >= 0 else ENEMY_COLOR
+        self.update_ui_text("RoundPnl", f"Round P&L: ${round_pnl:+.2f}", (0, 0.8), 0.05, color=round_pnl_color)
 
     def show_title_screen(self):
         self.clear_ui()
@@ -809,16 +783,45 @@ class RocketSphere(ShowBase):
         if hasattr(self, 'world_sphere'): self.world_sphere.setH(self.world_sphere.getH() + globalClock.getDt() * 5)
         return Task.cont
 
-    def update_ui_text(self, key, text, pos, scale=0.05, align=TextNode.ACenter, color=TEXT_COLOR):
-        if key in self.ui_elements:
-            self.ui_elements[key].setText(text); self.ui_elements[key].setFg(color)
+    def update_ui_text(self, key, text, pos, scale=0.05, align=TextNode.ACenter, color=TEXT_COLOR, interval=0.0):
+        # Retained text: setText regenerates the TextNode's geometry, so an element is only
+        # touched when its text or color differs from what it shows, and at most once every
+        # `interval` seconds
+        now = globalClock.getFrameTime()
+        color = tuple(color)
+        shown = self.ui_shown.get(key)
+        if shown is not None:
+            shown_text, shown_color, shown_at = shown
+            if (text == shown_text and color == shown_color) or now - shown_at < interval: return
+            element = self.ui_elements[key]
+            if text != shown_text: element.setText(text)
+            if color != shown_color: element.setFg(color)
         else: self.ui_elements[key] = OnscreenText(text=text, pos=pos, scale=scale, fg=color, align=align, mayChange=True, parent=self.aspect2d)
+        self.ui_shown[key] = (text, color, now)
+
+    def remove_ui_text(self, key):
+        if key in self.ui_elements: self.ui_elements.pop(key).destroy()
+        self.ui_shown.pop(key, None)
 
     def clear_ui(self):
         for e in self.ui_elements.values(): e.destroy()
         self.ui_elements.clear()
+        self.ui_shown.clear()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rocket Sphere")
+    parser.add_argument('--record', metavar='DIR', help="save a replay of every round to DIR")
+    parser.add_argument('--replay', metavar='FILE', help="play back a recorded round")
+    parser.add_argument('--profile', metavar='FILE', default=DEFAULT_PROFILE_PATH,
+                        help="where F4 exports the frame profile (.csv or .json)")
+    parser.add_argument('--pstats', action='store_true', help="connect to a running PStats server")
+    parser.add_argument('--serial-sim', action='store_true', help="tick the simulation on the main thread, between frames")
+    parser.add_argument('--log-rounds', action='store_true', help="print the bullet pool's high-water marks after every round")
+    parser.add_argument('--mesh-cache', metavar='DIR', help="save the built world meshes to DIR and load them from there on later runs")
+    args = parser.parse_args()
     print("Initializing Rocket Sphere...")
-    app = RocketSphere()
+    if args.pstats: PStatClient.connect()
+    MESH_CACHE_DIR = args.mesh_cache
+    app = RocketSphere(record_dir=args.record, replay_path=args.replay, profile_path=args.profile,
+                      threaded_sim=not args.serial_sim, log_rounds=args.log_rounds)
     app.run()
@@ -0,0 +1,136 @@
+import csv
+import json
+import threading
+import time
+
+import numpy as np
+
+# Per-phase frame profiler. The code being measured calls lap(phase) at the end of each
+# phase; the wall time since the previous lap (or begin_frame) is charged to that phase, so
+# the phases of a frame add up to all the time spent between begin_frame and the last lap.
+# Phases that run several times a frame (one per fixed tick) accumulate. Finished frames go
+# into a ring buffer of the last `capacity` frames, which can be summarised or exported.
+#
+# Each thread laps from its own mark. When the simulation ticks on a worker thread while the
+# main thread renders, the worker calls begin_thread() when it starts; its phases and the
+# render phases then overlap, and the frame's total is more than its wall time.
+#
+# An optional sink mirrors every lap and frame as it happens (pantheon.py uses one to feed
+# Panda3D's PStats); it needs lap(phase, elapsed) and end_frame(counts) methods.
+
+# --- Configuration & Constants ---
+PROFILE_HISTORY = 1800 # Frames kept in the ring buffer (30 s at 60 fps)
+# Frame phases in the order they run: the simulation ticks, then rendering
+SIM_PHASES = ('world', 'ai', 'movement', 'bullets', 'collision', 'removal', 'record')
+# 'sync' is the main thread waiting for simulation ticks running on another thread. Time the
+# main thread spends outside the frame's laps, such as Panda3D rendering the last frame, is
+# not charged to any phase
+RENDER_PHASES = ('restore', 'interpolate', 'camera', 'visibility', 'rocket_geom', 'bullet_geom', 'ui', 'sync')
+PHASES = SIM_PHASES + RENDER_PHASES
+# Per-frame entity counts. The summed counters add up over the frame's ticks; the rest
+# hold the last value set, carried over through frames that do not set them
+COUNTERS = ('ticks', 'alive_rockets', 'live_bullets', 'thinkers', 'pairs', 'visible_rockets', 'visible_bullets')
+SUMMED_COUNTERS = ('ticks', 'thinkers', 'pairs')
+FRAME_BUDGET_MS = 1000.0 / 60.0
+
+
+class FrameProfiler:
+    def __init__(self, capacity=PROFILE_HISTORY, sink=None, clock=time.perf_counter):
+        self.capacity = capacity
+        self.sink = sink
+        self.clock = clock
+        self.phase_index = {name: i for i, name in enumerate(PHASES)}
+        self.counter_index = {name: i for i, name in enumerate(COUNTERS)}
+        self.times = np.zeros((capacity, len(PHASES))) # Milliseconds per phase
+        self.counts = np.zeros((capacity, len(COUNTERS)), dtype=np.int64)
+        self.frame_dt = np.zeros(capacity) # Milliseconds since the previous frame, as the caller measured it
+        self.frame_number = np.zeros(capacity, dtype=np.int64)
+        self.frames_recorded = 0
+        self.in_frame = False
+        self.marks = threading.local()
+        self.current_counts = [0] * len(COUNTERS)
+        self.summed = [self.counter_index[name] for name in SUMMED_COUNTERS]
+
+    @property
+    def frames_kept(self):
+        return min(self.frames_recorded, self.capacity)
+
+    def begin_frame(self, frame_dt=0.0):
+        self.current_times = [0.0] * len(PHASES)
+        for i in self.summed: self.current_counts[i] = 0
+        self.current_dt = frame_dt * 1000.0
+        self.in_frame = True
+        self.begin_thread()
+
+    def begin_thread(self):
+        # Start the calling thread's next lap now
+        self.marks.mark = self.clock()
+
+    def lap(self, phase):
+        # Charge the time since the calling thread's previous lap to `phase`
+        if not self.in_frame: return
+        now = self.clock()
+        elapsed = now - self.marks.mark
+        self.marks.mark = now
+        self.current_times[self.phase_index[phase]] += elapsed * 1000.0
+        if self.sink: self.sink.lap(phase, elapsed)
+
+    def count(self, counter, value):
+        if self.in_frame: self.current_counts[self.counter_index[counter]] = int(value)
+
+    def add_count(self, counter, value):
+        if self.in_frame: self.current_counts[self.counter_index[counter]] += int(value)
+
+    def end_frame(self):
+        if not self.in_frame: return
+        row = self.frames_recorded % self.capacity
+        self.times[row] = self.current_times
+        self.counts[row] = self.current_counts
+        self.frame_dt[row] = self.current_dt
+        self.frame_number[row] = self.frames_recorded
+        self.frames_recorded += 1
+        self.in_frame = False
+        if self.sink: self.sink.end_frame(dict(zip(COUNTERS, self.current_counts)))
+
+    def _order(self, last=None):
+        # Ring buffer rows of the most recent `last` frames, oldest first
+        n = self.frames_kept if last is None else min(last, self.frames_kept)
+        return np.arange(self.frames_recorded - n, self.frames_recorded) % self.capacity
+
+    def frames(self, last=None):
+        # Columns of the recorded frames, oldest first
+        rows = self._order(last)
+        columns = {'frame': self.frame_number[rows], 'frame_dt': self.frame_dt[rows], 'total': self.times[rows].sum(axis=1)}
+        columns.update((name, self.times[rows, i]) for i, name in enumerate(PHASES))
+        columns.update((name, self.counts[rows, i]) for i, name in enumerate(COUNTERS))
+        return columns
+
+    def summary(self, last=None):
+        # (mean ms, max ms) per phase and for the total, and the mean count per counter,
+        # over the most recent `last` frames
+        rows = self._order(last)
+        if rows.size == 0: return None
+        times = self.times[rows]
+        totals = times.sum(axis=1)
+        return dict(
+            frames=rows.size,
+            frame_dt=float(self.frame_dt[rows].mean()),
+            total=(float(totals.mean()), float(totals.max())),
+            over_budget=int(np.count_nonzero(self.frame_dt[rows] > FRAME_BUDGET_MS)),
+            phases={name: (float(times[:, i].mean()), float(times[:, i].max())) for i, name in enumerate(PHASES)},
+            counts={name: float(self.counts[rows, i].mean()) for i, name in enumerate(COUNTERS)},
+        )
+
+    def export(self, path):
+        # Write the ring buffer to `path`: columnar JSON for .json, one row per frame otherwise (CSV)
+        columns = self.frames()
+        if path.endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump(dict(phases=PHASES, counters=COUNTERS, units='ms',
+                               columns={name: values.tolist() for name, values in columns.items()}), f)
+            return
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for row in zip(*(values.tolist() for values in columns.values())):
+                writer.writerow(f"{value:.4f}" if isinstance(value, float) else value for value in row)
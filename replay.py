@@ -0,0 +1,169 @@
+import json
+import struct
+
+import numpy as np
+
+from simulation import normalized_rows
+
+# Binary replays of Simulation rounds. A ReplayWriter attached as a Simulation's
+# `recorder` appends one record per tick; a Replay memory-maps the file and rebuilds
+# any tick in constant time from its keyframe plus one delta.
+#
+# File layout (little-endian):
+#   magic, u32 header length, JSON header (rocket count, tick_dt, keyframe interval,
+#   per-slot player/hunt-bot/ace flags, seed)
+#   one record per tick:
+#     f64[5]  time, world_radius, round_pnl, time_dilator, player turn speed
+#     keyframe ticks (every keyframe_interval):  f32 pos (N, 3), f32 velocity (N, 3), i32 kills (N)
+#     delta ticks:  f16 pos and velocity offsets from the keyframe (N, 3) each, u8 kills gained since it
+#     u8 active bits (packed N), u32 bullet count k, f32 bullet pos (k, 3), f16 bullet velocity (k, 3),
+#     i16 bullet shooter (k)
+#   i64 record offsets (one per tick), then the footer: u64 index offset, u64 tick count, magic
+
+# --- Configuration & Constants ---
+REPLAY_MAGIC = b"RSREPLAY"
+REPLAY_VERSION = 2
+REPLAY_KEYFRAME_INTERVAL = 30 # Ticks between full-precision keyframes (half a second at 60 Hz)
+SCALARS = ('time', 'world_radius', 'round_pnl', 'time_dilator') # Simulation attributes
+RECORD_SCALARS = SCALARS + ('player_turn_speed',) # Every scalar a record starts with
+FOOTER = struct.Struct("<QQ8s")
+
+
+class ReplayWriter:
+    def __init__(self, path, sim, keyframe_interval=REPLAY_KEYFRAME_INTERVAL):
+        self.file = open(path, "wb")
+        self.keyframe_interval = keyframe_interval
+        self.offsets = []
+        self.keyframe = None
+        state = sim.state
+        n = state.count
+        header = json.dumps(dict(
+            version=REPLAY_VERSION, num_rockets=n, tick_dt=sim.tick_dt, keyframe_interval=keyframe_interval,
+            player=sim.player, seed=sim.seed,
+            is_hunt_bot=np.flatnonzero(state.is_hunt_bot[:n]).tolist(), is_ace=np.flatnonzero(state.is_ace[:n]).tolist(),
+        )).encode()
+        self.file.write(REPLAY_MAGIC + struct.pack("<I", len(header)) + header)
+        self.record(sim) # Record i holds the state after i ticks
+
+    def record(self, sim):
+        # Append the state at the end of the tick just run
+        state, bullets = sim.state, sim.bullets
+        n = state.count
+        pos, velocity, kills = state.pos[:n], state.velocity[:n], state.kills[:n]
+        chunks = [np.array([getattr(sim, name) for name in SCALARS] + [state.turn_speed[sim.player]], dtype='<f8')]
+        if len(self.offsets) % self.keyframe_interval == 0:
+            self.keyframe = (pos.copy(), velocity.copy(), kills.copy())
+            chunks += [pos.astype('<f4'), velocity.astype('<f4'), kills.astype('<i4')]
+        else:
+            key_pos, key_velocity, key_kills = self.keyframe
+            chunks += [(pos - key_pos).astype('<f2'), (velocity - key_velocity).astype('<f2'),
+                       np.minimum(kills - key_kills, 255).astype('u1')]
+        live = np.flatnonzero(bullets.active[:bullets.count])
+        chunks += [np.packbits(state.active[:n]), np.array([live.size], dtype='<u4'),
+                   bullets.pos[live].astype('<f4'), bullets.velocity[live].astype('<f2'),
+                   bullets.shooter[live].astype('<i2')]
+        self.offsets.append(self.file.tell())
+        for chunk in chunks: self.file.write(chunk.tobytes())
+
+    def close(self):
+        if self.file.closed: return
+        index_offset = self.file.tell()
+        self.file.write(np.array(self.offsets, dtype='<i8').tobytes())
+        self.file.write(FOOTER.pack(index_offset, len(self.offsets), REPLAY_MAGIC))
+        self.file.close()
+
+
+# One reconstructed tick of a replay
+class ReplayFrame:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class Replay:
+    def __init__(self, path):
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self.data[:len(REPLAY_MAGIC)]) != REPLAY_MAGIC: raise ValueError(f"{path} is not a replay file")
+        start = len(REPLAY_MAGIC)
+        (header_len,) = struct.unpack("<I", bytes(self.data[start:start + 4]))
+        self.header = json.loads(bytes(self.data[start + 4:start + 4 + header_len]))
+        if self.header['version'] != REPLAY_VERSION: raise ValueError(f"unsupported replay version {self.header['version']}")
+        index_offset, self.num_ticks, magic = FOOTER.unpack(bytes(self.data[-FOOTER.size:]))
+        if magic != REPLAY_MAGIC: raise ValueError(f"{path} was not closed cleanly")
+        self.offsets = self.data[index_offset:index_offset + 8 * self.num_ticks].view('<i8')
+        self.num_rockets = self.header['num_rockets']
+        self.tick_dt = self.header['tick_dt']
+        self.keyframe_interval = self.header['keyframe_interval']
+
+    def __len__(self):
+        return self.num_ticks
+
+    def _read(self, offset, dtype, count):
+        dtype = np.dtype(dtype)
+        return self.data[offset:offset + dtype.itemsize * count].view(dtype), offset + dtype.itemsize * count
+
+    def frame(self, tick):
+        # State at the end of `tick`; one keyframe read plus one delta read whatever the tick
+        n = self.num_rockets
+        keyframe_tick = tick - tick % self.keyframe_interval
+        offset = int(self.offsets[keyframe_tick]) + 8 * len(RECORD_SCALARS)
+        pos, offset = self._read(offset, '<f4', 3 * n)
+        velocity, offset = self._read(offset, '<f4', 3 * n)
+        kills, offset = self._read(offset, '<i4', n)
+        pos, velocity, kills = pos.reshape(n, 3).astype(float), velocity.reshape(n, 3).astype(float), kills.copy()
+
+        offset = int(self.offsets[tick])
+        scalars, offset = self._read(offset, '<f8', len(RECORD_SCALARS))
+        if tick != keyframe_tick:
+            delta_pos, offset = self._read(offset, '<f2', 3 * n)
+            delta_velocity, offset = self._read(offset, '<f2', 3 * n)
+            delta_kills, offset = self._read(offset, 'u1', n)
+            pos += delta_pos.reshape(n, 3)
+            velocity += delta_velocity.reshape(n, 3)
+            kills += delta_kills
+        else:
+            offset += (4 * 3 + 4 * 3 + 4) * n
+        active_bits, offset = self._read(offset, 'u1', (n + 7) // 8)
+        (k,), offset = self._read(offset, '<u4', 1)
+        k = int(k)
+        bullet_pos, offset = self._read(offset, '<f4', 3 * k)
+        bullet_velocity, offset = self._read(offset, '<f2', 3 * k)
+        bullet_shooter, offset = self._read(offset, '<i2', k)
+        return ReplayFrame(
+            tick=tick, **dict(zip(RECORD_SCALARS, scalars.tolist())),
+            pos=pos, velocity=velocity, kills=kills, active=np.unpackbits(active_bits, count=n).astype(bool),
+            bullet_pos=bullet_pos.reshape(k, 3).astype(float), bullet_velocity=bullet_velocity.reshape(k, 3).astype(float),
+            bullet_shooter=bullet_shooter.astype(np.int32),
+        )
+
+    def setup(self, sim):
+        # Give a fresh Simulation this replay's rocket roster
+        state = sim.state
+        n = self.num_rockets
+        state.is_hunt_bot[:n] = False
+        state.is_hunt_bot[self.header['is_hunt_bot']] = True
+        state.is_ace[:n] = False
+        state.is_ace[self.header['is_ace']] = True
+        sim.player = self.header['player']
+        sim.tick_dt = self.tick_dt
+
+    def restore(self, sim, position):
+        # Load the replay into `sim` at a fractional tick `position`: rockets interpolate
+        # from the floor tick to the next one through the sim's usual prev/current arrays
+        tick = int(np.clip(np.floor(position), 0, self.num_ticks - 1))
+        prev, cur = self.frame(tick), self.frame(min(tick + 1, self.num_ticks - 1))
+        state, n = sim.state, self.num_rockets
+        state.prev_pos[:n], state.pos[:n] = prev.pos, cur.pos
+        state.velocity[:n] = cur.velocity
+        state.speed[:n] = np.sqrt((cur.velocity * cur.velocity).sum(axis=1))
+        for forward, frame in ((state.prev_forward, prev), (state.forward, cur)):
+            heading = normalized_rows(frame.velocity)
+            moving = (heading * heading).sum(axis=1) > 0
+            forward[:n][moving] = heading[moving]
+        state.kills[:n] = cur.kills
+        state.turn_speed[sim.player] = cur.player_turn_speed
+        state.active[:n] = cur.active
+        sim.bullets.clear()
+        sim.bullets.spawn(cur.bullet_pos, cur.bullet_velocity, cur.bullet_shooter, np.inf)
+        for name in SCALARS: setattr(sim, name, getattr(cur, name))
+        sim.tick = cur.tick
+        sim.accumulator = (min(max(position - tick, 0.0), 1.0) if tick + 1 < self.num_ticks else 0.0) * sim.tick_dt
@@ -0,0 +1,1007 @@
+import math
+import itertools
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Headless Rocket Sphere simulation: every rule of a round (movement on the sphere, AI,
+# bullets, cone collisions, world shrink, time dilation and P&L) with no rendering
+# dependencies. pantheon.py renders a Simulation; batch tools can drive one directly.
+
+# --- Configuration & Constants ---
+STARTING_WORLD_RADIUS = 450.0
+MIN_WORLD_RADIUS = 50.0
+WORLD_SHRINK_SPEED = 0.5
+
+# Time Dilation Settings
+STARTING_ROCKETS = 200
+MIN_TIME_DILATOR = 0.5
+MAX_TIME_DILATOR = 1.0
+SIM_TICK_RATE = 60.0 # Fixed simulation ticks per simulated second
+MAX_TICKS_PER_FRAME = 4 # Ticks advance() may run per call; slower machines drop the backlog and slow down
+
+# Rocket Settings
+ROCKET_FORWARD_SPEED = 45.0
+ROCKET_TURN_SPEED = 55.0
+TURN_RADIUS_DECREASE_PER_KILL = 0.05
+TURN_PENALTY_ON_MISS = 0.01 # Every missed shot increases turn radius
+MIN_SPAWN_SEPARATION = 15.0
+ROCKET_SCALE = (1.5, 2.5, 1.5)
+# Cone hitbox in the rocket's local (unscaled) space, matching pantheon.cone_mesh()
+ROCKET_CONE_HEIGHT = 2.0
+ROCKET_CONE_RADIUS = 0.7
+
+# Combat Settings
+BULLET_RADIUS = 0.5
+BULLET_SPEED = 90.0
+BULLET_LIFETIME = 2.0 # This is now the fixed lifetime for all bullets
+SHOOT_COOLDOWN = 0.1
+BULLET_POOL_COMPACT_RATIO = 0.5 # Compact the bullet pool once more than this share of its rows are free
+BULLET_SPAWN_OFFSET = 4.0 # Distance ahead of the rocket at which bullets spawn
+def rocket_hit_radius():
+    # World-space radius around a rocket's origin that encloses its (bullet-padded) cone hitbox
+    return math.hypot(ROCKET_SCALE[1] * ROCKET_CONE_HEIGHT / 2.0,
+                      max(ROCKET_SCALE[0], ROCKET_SCALE[2]) * (ROCKET_CONE_RADIUS + BULLET_RADIUS))
+ROCKET_HIT_RADIUS = rocket_hit_radius() # Derived; recompute after changing the constants above
+BROADPHASE_CELL_SIZE = 8.0 # Minimum edge of a spatial hash cell, must be >= ROCKET_HIT_RADIUS
+SWEEP_MAX_SAG = 0.05 # Swept paths are split until each straight piece strays at most this far from its arc
+SWEEP_MAX_PIECES = 16
+
+# AI Settings
+AI_OPTIMAL_DISTANCE = 60.0
+AI_SHOOT_RANGE = 100.0 # Increased aggression
+# Targeting constants
+AI_PRIORITY_DISTANCE_WEIGHT = 0.8
+AI_PRIORITY_KILLS_WEIGHT = 0.25
+AI_TARGET_CANDIDATES = 16 # Nearest rockets scored first by select_target before widening the search
+AI_RETARGET_CHANCE = 0.05 # Per-tick chance to re-pick a target while hunting
+# Advanced AI Settings
+AI_LEAD_SHOT_ACCURACY = 0.90 # Cosine of angle for firing a predictive shot
+# Ace and Jinking constants
+AI_ACE_CHANCE = 0.00 # 20% chance for an AI to be an "Ace"
+AI_ACE_SPEED_BONUS = 1.1 # 10% faster
+AI_ACE_TURN_BONUS = 1.25 # 25% more agile
+AI_JINK_INTERVAL = 1.5 # How often an AI considers jinking
+AI_JINK_CHANCE = 0.9 # 50% chance to jink when the timer is up
+AI_JINK_DURATION = 0.3 # How long the jink maneuver lasts
+# Hunt Bot settings
+NUM_HUNT_BOTS = 10
+
+# AI Level of Detail
+# (max distance to the player, think interval in ticks); the last tier catches everything else
+AI_LOD_TIERS = ((150.0, 1), (400.0, 3), (math.inf, 6))
+AI_LOD_HIDDEN_INTERVAL = 8 # Rockets the renderer reports as hidden think at most this often
+AI_THINK_BUDGET = 96 # Max AI rockets that think in one tick; the most overdue go first
+
+# P&L Tracking Constants
+ANTE_COST = 0.25
+KILL_REWARD = 0.20
+WIN_BONUS = 10.00
+
+
+# --- Helper Functions ---
+def normalized_rows(a):
+    # Row-wise normalize for an (N, 3) array; near-zero rows become zero
+    length_sq = (a * a).sum(axis=1, keepdims=True)
+    safe = length_sq > 1e-6
+    return np.where(safe, a / np.sqrt(np.where(safe, length_sq, 1.0)), 0.0)
+
+def tangent_directions(direction, up):
+    # Project directions onto the sphere's tangent plane at `up` and normalize them
+    return normalized_rows(direction - up * (direction * up).sum(axis=1, keepdims=True))
+
+def intercept_directions(my_pos, target_pos, target_vel, world_radius):
+    # Lead prediction for shooting at moving targets: 3 fixed-point iterations
+    time_to_impact = np.sqrt(((target_pos - my_pos) ** 2).sum(axis=1, keepdims=True)) / BULLET_SPEED
+    for _ in range(3):
+        predicted_pos = normalized_rows(target_pos + target_vel * time_to_impact) * world_radius
+        time_to_impact = np.sqrt(((predicted_pos - my_pos) ** 2).sum(axis=1, keepdims=True)) / BULLET_SPEED
+    return normalized_rows(predicted_pos - my_pos)
+
+def initial_forward_rows(pos):
+    # A stable tangent heading for rockets at `pos` that have no velocity to follow
+    up = normalized_rows(pos)
+    ref = np.zeros_like(up); ref[:, 1] = 1.0
+    near_pole = np.abs(up[:, 1]) > 0.99
+    ref[near_pole] = (1.0, 0.0, 0.0)
+    return normalized_rows(np.cross(ref, up))
+
+def heading_rows(direction, pos, fallback=None):
+    # Unit tangent headings along `direction` for rockets at `pos`. Rows whose direction has
+    # no tangent part keep the matching `fallback` heading (the last valid one), or a stable
+    # default when that is missing or degenerate too
+    up = normalized_rows(pos)
+    forward = tangent_directions(direction, up)
+    degenerate = (forward * forward).sum(axis=1) == 0
+    if not degenerate.any(): return forward
+    if fallback is not None:
+        forward[degenerate] = tangent_directions(fallback[degenerate], up[degenerate])
+        degenerate = (forward * forward).sum(axis=1) == 0
+    if degenerate.any():
+        forward[degenerate] = initial_forward_rows(pos[degenerate])
+    return forward
+
+def orientation_bases(pos, forward):
+    # Rotations (N, 3, 3) of rockets at `pos` heading along the tangent headings `forward`, in
+    # one pass: rows are the local x (right), y (forward) and z (up) axes in world space, the
+    # frame lookAt(pos + forward, pos) gives a single node. The renderer draws the rockets with
+    # these and the collider's hitbox frames are their inverses, so both always agree.
+    up = normalized_rows(pos)
+    return np.stack([np.cross(forward, up), forward, up], axis=1)
+
+def generate_spawn_points(num_points, radius=None):
+    # Fibonacci sphere: evenly spread spawn positions, on the starting world by default
+    if radius is None: radius = STARTING_WORLD_RADIUS
+    i = np.arange(num_points)
+    y = 1 - (i / float(max(num_points - 1, 1))) * 2
+    ring = np.sqrt(1 - y * y)
+    theta = math.pi * (3. - math.sqrt(5.)) * i
+    return np.stack([np.cos(theta) * ring, y, np.sin(theta) * ring], axis=1) * radius
+
+
+# --- CPU BULLET STORE ---
+# Fixed-capacity pool of bullet slots over preallocated structure-of-arrays storage.
+# Rows [0, count) have been handed out; retired rows go on a free list and are the first
+# reused by the next spawns, so spawning and retiring bullets allocates nothing. Live
+# bullets are flagged in `active`. compact() only moves live bullets down to the front
+# once more than BULLET_POOL_COMPACT_RATIO of the handed-out rows are free.
+# Shooters are referenced by their RocketState slot index (-1 for none).
+# live_count[shooter] tracks each shooter's active bullets so the N+1 rule is O(1).
+class BulletStore:
+    def __init__(self, shooter_capacity, capacity=256):
+        self.count = 0
+        self.live = 0
+        self.free_count = 0
+        self.high_water = 0 # Most bullets live at once
+        self.high_water_rows = 0 # Most rows handed out at once
+        self.live_count = np.zeros(shooter_capacity, dtype=np.int32)
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        # Called once up front; only called again if spawns ever outrun the capacity
+        old = getattr(self, 'pos', None)
+        self.capacity = capacity
+        arrays = dict(
+            pos=np.zeros((capacity, 3)), prev_pos=np.zeros((capacity, 3)), velocity=np.zeros((capacity, 3)),
+            age=np.zeros(capacity), max_age=np.zeros(capacity),
+            shooter=np.full(capacity, -1, dtype=np.int32), active=np.zeros(capacity, dtype=bool),
+            free=np.zeros(capacity, dtype=np.intp),
+        )
+        for name, array in arrays.items():
+            if old is not None: array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+
+    def __len__(self):
+        return self.live
+
+    def spawn(self, pos, velocity, shooters, max_age):
+        # Fill one slot per row of `pos`/`velocity`, fired by the matching `shooters` slot.
+        # Free-list slots are reused first, then fresh rows are taken from the end.
+        shooters = np.asarray(shooters, dtype=np.int32)
+        k = len(shooters)
+        if k == 0: return
+        reused = min(k, self.free_count)
+        fresh = k - reused
+        if self.count + fresh > self.capacity:
+            capacity = self.capacity
+            while self.count + fresh > capacity: capacity *= 2
+            self._allocate(capacity)
+        self.free_count -= reused
+        rows = np.concatenate([self.free[self.free_count:self.free_count + reused],
+                               np.arange(self.count, self.count + fresh)])
+        self.count += fresh
+        self.pos[rows] = pos
+        self.prev_pos[rows] = pos
+        self.velocity[rows] = velocity
+        self.age[rows] = 0.0
+        self.max_age[rows] = max_age
+        self.shooter[rows] = shooters
+        self.active[rows] = True
+        np.add.at(self.live_count, shooters[shooters >= 0], 1)
+        self.live += k
+        self.high_water = max(self.high_water, self.live)
+        self.high_water_rows = max(self.high_water_rows, self.count)
+
+    def clear(self):
+        self.active[:self.count] = False
+        self.live_count[:] = 0
+        self.count = self.live = self.free_count = 0
+
+    def active_count(self, shooter):
+        return int(self.live_count[shooter])
+
+    def deactivate(self, idx):
+        # Retire the given bullets (expiry or hit), release them from their shooters' counts
+        # and put their slots on the free list
+        idx = np.asarray(idx, dtype=np.intp)
+        idx = idx[self.active[idx]]
+        self.active[idx] = False
+        shooters = self.shooter[idx]
+        np.subtract.at(self.live_count, shooters[shooters >= 0], 1)
+        self.free[self.free_count:self.free_count + idx.size] = idx
+        self.free_count += idx.size
+        self.live -= idx.size
+
+    def integrate(self, dt, world_radius):
+        # Age every live bullet, expire old ones and move the rest along the sphere.
+        # Returns the indices of the bullets still in flight.
+        n = self.count
+        self.age[:n] += np.where(self.active[:n], dt, 0.0)
+        self.deactivate(np.flatnonzero(self.active[:n] & (self.age[:n] > self.max_age[:n])))
+        idx = np.flatnonzero(self.active[:n])
+        vel = self.velocity[idx]
+        self.prev_pos[idx] = self.pos[idx]
+        new_pos_norm = normalized_rows(self.pos[idx] + vel * dt)
+        self.pos[idx] = new_pos_norm * world_radius
+        self.velocity[idx] = vel - new_pos_norm * (vel * new_pos_norm).sum(axis=1, keepdims=True)
+        return idx
+
+    def compact(self, force=False):
+        # Move live bullets to the front (keeping their order) and empty the free list,
+        # but only once the handed-out rows are mostly holes
+        if not force and self.free_count <= BULLET_POOL_COMPACT_RATIO * self.count: return
+        keep = np.flatnonzero(self.active[:self.count])
+        for name in ('pos', 'prev_pos', 'velocity', 'age', 'max_age', 'shooter', 'active'):
+            array = getattr(self, name)
+            array[:keep.size] = array[keep]
+        self.active[keep.size:self.count] = False
+        self.count = keep.size
+        self.free_count = 0
+
+    def lerp_pos(self, alpha):
+        # Live bullet positions `alpha` of the way from the previous tick to the current one
+        idx = np.flatnonzero(self.active[:self.count])
+        return self.prev_pos[idx] + (self.pos[idx] - self.prev_pos[idx]) * alpha
+
+    def stats(self):
+        # Pool occupancy and high-water marks, for tuning the capacity
+        return dict(capacity=self.capacity, live=self.live, rows=self.count, free=self.free_count,
+                    high_water=self.high_water, high_water_rows=self.high_water_rows)
+
+
+# --- Rocket State Store ---
+# Structure-of-arrays store for the simulation state of every rocket in a round.
+# Each rocket owns one slot for the whole round; slots are never reused,
+# destroyed rockets are simply cleared from the `active` mask.
+class RocketState:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.count = 0
+        self.pos = np.zeros((capacity, 3))
+        self.velocity = np.zeros((capacity, 3))
+        self.forward = np.zeros((capacity, 3)) # Last valid tangent forward vector
+        self.prev_pos = np.zeros((capacity, 3)) # pos and forward as of the previous tick, for interpolation
+        self.prev_forward = np.zeros((capacity, 3))
+        self.speed = np.zeros(capacity)
+        self.base_turn_speed = np.zeros(capacity)
+        self.turn_speed = np.zeros(capacity)
+        self.shoot_timer = np.zeros(capacity)
+        self.jink_timer = np.zeros(capacity)
+        self.jinking_time_left = np.zeros(capacity)
+        self.evade_dir = np.ones(capacity, dtype=np.int8)
+        self.kills = np.zeros(capacity, dtype=np.int32)
+        self.target = np.full(capacity, -1, dtype=np.int32) # Standard AI hunting target slot
+        self.active = np.zeros(capacity, dtype=bool)
+        self.is_player = np.zeros(capacity, dtype=bool)
+        self.is_hunt_bot = np.zeros(capacity, dtype=bool)
+        self.is_ace = np.zeros(capacity, dtype=bool)
+
+    def update(self, dt, world_radius):
+        # One vectorized movement step for every active rocket
+        idx = np.flatnonzero(self.active[:self.count])
+        if idx.size == 0: return
+        pos, vel = self.pos[idx], self.velocity[idx]
+        self.prev_pos[idx], self.prev_forward[idx] = pos, self.forward[idx]
+
+        # Move along the sphere, reproject and strip the radial velocity
+        moving = (vel * vel).sum(axis=1) > 0
+        new_pos = pos + vel * dt
+        new_pos_norm = normalized_rows(new_pos)
+        pos = np.where(moving[:, None], new_pos_norm * world_radius, pos)
+        radial = (vel * new_pos_norm).sum(axis=1, keepdims=True)
+        vel = np.where(moving[:, None], vel - new_pos_norm * radial, vel)
+        self.pos[idx], self.velocity[idx] = pos, vel
+
+        # Orient along the velocity projected onto the tangent plane
+        self.forward[idx] = heading_rows(vel, pos, fallback=self.forward[idx])
+
+        # Timers
+        timer = self.shoot_timer[idx]
+        self.shoot_timer[idx] = np.where(timer > 0, timer - dt, timer)
+        timer = self.jink_timer[idx]
+        self.jink_timer[idx] = np.where((timer > 0) & ~self.is_player[idx], timer - dt, timer)
+
+    def lerp(self, alpha):
+        # Positions and unit tangent headings `alpha` of the way from the previous tick to the
+        # current one; a rocket that turned right around within the tick keeps its current heading
+        n = self.count
+        pos = self.prev_pos[:n] + (self.pos[:n] - self.prev_pos[:n]) * alpha
+        forward = self.prev_forward[:n] + (self.forward[:n] - self.prev_forward[:n]) * alpha
+        return pos, heading_rows(forward, pos, fallback=self.forward[:n])
+
+
+# --- Per-tick AI World Snapshot ---
+# Read-only view of the fleet taken once per tick before the AI pass. Every AI rocket
+# reads the same frozen positions, velocities, kills and active mask (indexed by slot)
+# and excludes itself by its own slot index, so no per-rocket candidate lists are built.
+# Also holds the KD-tree used for targeting and solves standard-AI shots in one batch.
+class WorldSnapshot:
+    def __init__(self, state, world_radius):
+        n = state.count
+        self.world_radius = world_radius
+        self.pos = state.pos[:n].copy()
+        self.velocity = state.velocity[:n].copy()
+        self.kills = state.kills[:n].copy()
+        self.active = state.active[:n].copy()
+        for array in (self.pos, self.velocity, self.kills, self.active):
+            array.setflags(write=False)
+
+        self.slots = np.flatnonzero(self.active)
+        self.tree = cKDTree(self.pos[self.slots]) if self.slots.size else None
+
+    def range_pairs(self, sources, radius):
+        # Every (a, b) pair with a in `sources`, b another active slot and |pos[a] - pos[b]| <= radius
+        sources = np.asarray(sources, dtype=np.intp)
+        if self.slots.size < 2 or sources.size == 0: return np.zeros((2, 0), dtype=np.intp)
+        # Query a hair wider, then apply the exact squared-distance test
+        neighbours = self.tree.query_ball_point(self.pos[sources], radius * (1 + 1e-9), return_sorted=False)
+        counts = np.fromiter(map(len, neighbours), dtype=np.intp, count=sources.size)
+        a = np.repeat(sources, counts)
+        b = self.slots[np.fromiter(itertools.chain.from_iterable(neighbours), dtype=np.intp, count=counts.sum())]
+        delta = self.pos[a] - self.pos[b]
+        keep = (a != b) & ((delta * delta).sum(axis=1) <= radius * radius)
+        return np.stack([a[keep], b[keep]])
+
+    def shot_solutions(self, is_shooter):
+        # Batched standard-AI offense check. Given a slot mask of shooters, returns the slot
+        # mask of those with any other rocket within AI_SHOOT_RANGE whose intercept direction
+        # lies inside the AI_LEAD_SHOT_ACCURACY cone around the shooter's heading.
+        shooters, targets = self.range_pairs(np.flatnonzero(is_shooter), AI_SHOOT_RANGE)
+
+        my_pos = self.pos[shooters]
+        aim_dir = intercept_directions(my_pos, self.pos[targets], self.velocity[targets], self.world_radius)
+        my_forward = normalized_rows(self.velocity[shooters])
+        on_target = (my_forward * aim_dir).sum(axis=1) > AI_LEAD_SHOT_ACCURACY
+
+        has_shot = np.zeros(len(is_shooter), dtype=bool)
+        has_shot[shooters[on_target]] = True
+        return has_shot
+
+    def nearest(self, indices):
+        # Slot of the closest other active rocket for each of `indices`, or -1
+        indices = np.asarray(indices, dtype=np.intp)
+        if self.slots.size < 2: return np.full(len(indices), -1, dtype=np.intp)
+        _, rows = self.tree.query(self.pos[indices], k=2)
+        candidates = self.slots[rows]
+        return np.where(candidates[:, 0] != indices, candidates[:, 0], candidates[:, 1])
+
+    def best_targets(self, indices):
+        # Highest scoring other rocket by distance and kills for each of `indices`, or -1.
+        # Candidates are scored nearest first; the search only widens while a farther rocket
+        # could still win on kills, so the result is the same as scoring every rocket.
+        indices = np.asarray(indices, dtype=np.intp)
+        best = np.full(len(indices), -1, dtype=np.intp)
+        n = self.slots.size
+        if n < 2 or len(indices) == 0: return best
+        max_kill_bonus = 1.0 + self.kills[self.slots].max() * AI_PRIORITY_KILLS_WEIGHT
+        pending = np.arange(len(indices))
+        k = min(AI_TARGET_CANDIDATES + 1, n)
+        while pending.size:
+            dist, rows = self.tree.query(self.pos[indices[pending]], k=k)
+            candidates = self.slots[rows]
+            priority = AI_PRIORITY_DISTANCE_WEIGHT * (1.0 / (dist + 1.0))
+            priority *= (1.0 + self.kills[candidates] * AI_PRIORITY_KILLS_WEIGHT)
+            priority[candidates == indices[pending, None]] = -1.0
+            top = np.argmax(priority, axis=1)
+            top_priority = priority[np.arange(pending.size), top]
+            # Every rocket outside the queried set is at least dist[:, -1] away
+            settled = top_priority > AI_PRIORITY_DISTANCE_WEIGHT * (1.0 / (dist[:, -1] + 1.0)) * max_kill_bonus
+            if k == n: settled[:] = True
+            best[pending[settled]] = candidates[settled, top[settled]]
+            pending = pending[~settled]
+            k = min(k * 2, n)
+        return best
+
+
+# --- AI Level of Detail Scheduler ---
+# Picks which AI rockets think on a given tick. Rockets are put into AI_LOD_TIERS by
+# distance to the player, and rockets the renderer reports as hidden think no more often
+# than AI_LOD_HIDDEN_INTERVAL. Slots start staggered so a tier's rockets take turns
+# instead of all thinking on the same tick. At most `budget` rockets think per tick; the
+# rest stay due and are first in line next tick. Rockets that are not thinking keep
+# flying on their current velocity; movement is still integrated every tick.
+# Settings left as None are read from the module constants when the scheduler is made.
+class AIScheduler:
+    def __init__(self, tiers=None, hidden_interval=None, budget=None):
+        self.tiers = AI_LOD_TIERS if tiers is None else tiers
+        self.hidden_interval = AI_LOD_HIDDEN_INTERVAL if hidden_interval is None else hidden_interval
+        self.budget = AI_THINK_BUDGET if budget is None else budget
+
+    def reset(self, capacity):
+        # Tick on which each slot last thought, staggered across the longest interval
+        longest = max(max(interval for _, interval in self.tiers), self.hidden_interval)
+        self.last_think = -1 - np.arange(capacity) % longest
+
+    def intervals(self, pos, player_pos, visible):
+        dist = np.sqrt(((pos - player_pos) ** 2).sum(axis=1))
+        limits = np.array([limit for limit, _ in self.tiers])
+        tier_intervals = np.array([interval for _, interval in self.tiers])
+        interval = tier_intervals[np.minimum(np.searchsorted(limits, dist), len(limits) - 1)]
+        if visible is not None: interval = np.where(visible, interval, np.maximum(interval, self.hidden_interval))
+        return interval
+
+    def schedule(self, ai, pos, player_pos, tick, visible=None):
+        # Slots among `ai` that think this tick, and the ticks elapsed since each last thought
+        ai = np.asarray(ai, dtype=np.intp)
+        interval = self.intervals(pos[ai], player_pos, None if visible is None else visible[ai])
+        elapsed = tick - self.last_think[ai]
+        due = np.flatnonzero(elapsed >= interval)
+        if due.size > self.budget:
+            # Most overdue relative to their interval first, nearer tiers break ties
+            order = np.lexsort((interval[due], -(elapsed[due] / interval[due])))
+            due = np.sort(due[order[:self.budget]])
+        thinkers = ai[due]
+        self.last_think[thinkers] = tick
+        return thinkers, elapsed[due]
+
+def every_tick_scheduler():
+    # A scheduler under which every AI rocket thinks on every tick, whatever its distance to
+    # the player, so headless and balancing runs do not depend on where the player slot is
+    return AIScheduler(tiers=((math.inf, 1),), hidden_interval=1, budget=math.inf)
+
+
+# --- Spatial Hash Broadphase ---
+# Sparse uniform grid over the bounding cube of the world sphere. Only cells crossing
+# the surface are ever occupied, so memory follows the sphere's area. The grid
+# resolution is recomputed from the world radius on every rebuild so cell edges stay
+# close to `cell_size` while the world shrinks from STARTING_WORLD_RADIUS to
+# MIN_WORLD_RADIUS.
+class SphereGrid:
+    def __init__(self, cell_size=None):
+        self.cell_size = BROADPHASE_CELL_SIZE if cell_size is None else cell_size
+        self.rebuild(np.zeros((0, 3)), STARTING_WORLD_RADIUS)
+
+    def rebuild(self, points, world_radius):
+        # Re-index `points`; query results refer to rows of this array
+        # Pad slightly so points a hair outside the sphere still land inside the grid
+        self.extent = world_radius * 1.01 + self.cell_size
+        self.cells_per_axis = max(1, int(2.0 * self.extent // self.cell_size))
+        self.cell_edge = 2.0 * self.extent / self.cells_per_axis
+        self.points = np.asarray(points, dtype=float).reshape(-1, 3)
+        keys = self._keys(self._cells(self.points))
+        self.order = np.argsort(keys, kind='stable')
+        self.cell_keys, self.cell_start, self.cell_count = np.unique(keys[self.order], return_index=True, return_counts=True)
+
+    def _cells(self, points):
+        cells = np.floor((points + self.extent) / self.cell_edge).astype(np.int64)
+        return np.clip(cells, 0, self.cells_per_axis - 1)
+
+    def _keys(self, cells):
+        n = self.cells_per_axis
+        return (cells[..., 0] * n + cells[..., 1]) * n + cells[..., 2]
+
+    def query_pairs(self, points, radius):
+        # All (query_index, item_index) pairs with |points[q] - items[i]| <= radius,
+        # sorted by query index and then item index.
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        empty = np.zeros(0, dtype=np.intp)
+        if len(points) == 0 or len(self.points) == 0: return empty, empty
+
+        reach = max(1, int(math.ceil(radius / self.cell_edge)))
+        span = np.arange(-reach, reach + 1)
+        offsets = np.stack(np.meshgrid(span, span, span, indexing='ij'), axis=-1).reshape(-1, 3)
+        cells = self._cells(points)
+        # Only probe neighbouring cells that the query ball actually overlaps
+        low = points + self.extent - radius
+        high = points + self.extent + radius
+        first = np.floor(low / self.cell_edge).astype(np.int64) - cells
+        last = np.floor(high / self.cell_edge).astype(np.int64) - cells
+        probe = ((offsets[None] >= first[:, None]) & (offsets[None] <= last[:, None])).all(axis=2)
+        query, offset = np.nonzero(probe)
+        neighbours = cells[query] + offsets[offset]
+        in_grid = ((neighbours >= 0) & (neighbours < self.cells_per_axis)).all(axis=1)
+        query, keys = query[in_grid], self._keys(neighbours[in_grid])
+
+        slot = np.minimum(np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1)
+        found = self.cell_keys[slot] == keys
+        query, cell = query[found], slot[found]
+        counts = self.cell_count[cell]
+
+        # Expand every (query, occupied cell) match into one row per item stored in that cell
+        query = np.repeat(query, counts)
+        run_start = np.repeat(np.cumsum(counts) - counts, counts)
+        items = self.order[np.repeat(self.cell_start[cell], counts) + np.arange(counts.sum()) - run_start]
+
+        delta = points[query] - self.points[items]
+        close = (delta * delta).sum(axis=1) <= radius * radius
+        query, items = query[close], items[close]
+        order = np.lexsort((items, query))
+        return query[order], items[order]
+
+    def query_radius(self, point, radius):
+        # Indices of the indexed points within `radius` of a single point, in index order
+        return self.query_pairs(np.asarray(point, dtype=float)[None, :], radius)[1]
+
+
+# --- Batched Cone Collision ---
+# Tests bullets against every rocket's cone hitbox at once. The rocket world-to-local
+# transforms are stacked into (R, 3, 4) matrix arrays, built from the RocketState
+# positions and forward vectors (the frame the renderer draws rockets in) for just the
+# rockets the broadphase paired with a bullet.
+#
+# The test is swept: a bullet hits a rocket if it is inside the cone at any moment of the
+# tick, not just at its end. Over a tick bullets and rockets move along arcs of the sphere
+# and rockets turn from their previous forward vector to the current one. The tick is cut
+# into pieces short enough that, seen from the rocket, the bullet moves in a straight line
+# to within SWEEP_MAX_SAG, and each straight piece is solved exactly against the cone.
+def rocket_frames(pos, forward):
+    # World-to-local transforms (R, 3, 4) for rockets at `pos` heading along `forward`
+    # Rows of the inverse rotation, divided by the node scale
+    basis = orientation_bases(pos, forward) / np.asarray(ROCKET_SCALE)[None, :, None]
+    return np.concatenate([basis, -np.einsum('rij,rj->ri', basis, pos)[:, :, None]], axis=2)
+
+def to_local(frames, points):
+    return np.einsum('kij,kj->ki', frames[:, :, :3], points) + frames[:, :, 3]
+
+def arc_points(start, end, s):
+    # Points `s` of the way along the sphere arcs from `start` to `end` (rows)
+    if s == 0.0: return start
+    if s == 1.0: return end
+    radius = np.sqrt((start * start).sum(axis=1)) * (1.0 - s) + np.sqrt((end * end).sum(axis=1)) * s
+    return normalized_rows(start + (end - start) * s) * radius[:, None]
+
+def arc_sag(chord, radius):
+    # Furthest an arc of `radius` strays from its chord of length `chord`
+    half = min(chord / 2.0, radius)
+    return radius - math.sqrt(radius * radius - half * half)
+
+def cone_entry_times(start, end):
+    # Earliest fraction s in [0, 1] at which a point moving straight from local start[k] to
+    # end[k] is inside the padded cone; inf if it never is
+    d = end - start
+    apex_y = ROCKET_CONE_HEIGHT / 2.0
+    base_y = -ROCKET_CONE_HEIGHT / 2.0
+    # 1. The stretch of the path within the height-range of the cone
+    level = d[:, 1] == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_base = (base_y - start[:, 1]) / d[:, 1]
+        t_apex = (apex_y - start[:, 1]) / d[:, 1]
+    lo = np.where(level, 0.0, np.maximum(np.minimum(t_base, t_apex), 0.0))
+    hi = np.where(level, 1.0, np.minimum(np.maximum(t_base, t_apex), 1.0))
+    reaches = np.where(level, (base_y <= start[:, 1]) & (start[:, 1] <= apex_y), lo <= hi)
+
+    # 2./3. The cone radius grows linearly from the base and the distance from the axis must
+    # stay under it, padded by the bullet's radius: q(s) = x^2 + z^2 - (u + v s)^2 < 0
+    slope = ROCKET_CONE_RADIUS / ROCKET_CONE_HEIGHT
+    u = slope * (start[:, 1] - base_y) + BULLET_RADIUS
+    v = slope * d[:, 1]
+    qa = d[:, 0] ** 2 + d[:, 2] ** 2 - v * v
+    qb = 2.0 * (start[:, 0] * d[:, 0] + start[:, 2] * d[:, 2] - u * v)
+    qc = start[:, 0] ** 2 + start[:, 2] ** 2 - u * u
+    q_lo = (qa * lo + qb) * lo + qc
+
+    # 4. Inside from the start of the stretch, or the first crossing into the cone within it.
+    # Opening upwards q is negative between its roots, opening downwards outside them.
+    disc = qb * qb - 4.0 * qa * qc
+    with np.errstate(divide='ignore', invalid='ignore'):
+        root = np.sqrt(np.maximum(disc, 0.0))
+        near, far = (-qb - root) / (2.0 * qa), (-qb + root) / (2.0 * qa)
+        linear = -qc / qb
+    crossing = np.where(qa > 0, np.minimum(near, far), np.maximum(near, far))
+    crossing = np.where(disc > 0, crossing, np.inf)
+    crossing = np.where(np.abs(qa) < 1e-12, np.where(qb < 0, linear, np.inf), crossing)
+    entry = np.where(q_lo < 0, lo, np.where((lo <= crossing) & (crossing < hi), crossing, np.inf))
+    return np.where(reaches, entry, np.inf)
+
+class ConeCollider:
+    def __init__(self):
+        self.set_rockets(np.zeros(0, dtype=np.intp), np.zeros((0, 3)), np.zeros((0, 3)))
+
+    def set_rockets(self, slots, pos, forward, prev_pos=None, prev_forward=None):
+        # Where the rockets are at the end of the tick and, optionally, where they started it;
+        # rockets without a previous state are treated as holding still
+        self.slots = slots
+        self.pos, self.forward = pos, forward
+        self.prev_pos = pos if prev_pos is None else prev_pos
+        self.prev_forward = forward if prev_forward is None else prev_forward
+
+    def frames_at(self, s, rockets):
+        # Transforms of `rockets` (positions in self.slots) `s` of the way through the tick
+        if s == 1.0: return rocket_frames(self.pos[rockets], self.forward[rockets])
+        pos = arc_points(self.prev_pos[rockets], self.pos[rockets], s)
+        prev_forward, forward = self.prev_forward[rockets], self.forward[rockets]
+        return rocket_frames(pos, heading_rows(prev_forward + (forward - prev_forward) * s, pos, fallback=forward))
+
+    def sweep_pieces(self, start, end, rockets):
+        # Pieces the tick is cut into so that, in the frame of any of `rockets`, the path of
+        # every point strays at most SWEEP_MAX_SAG from a straight line. The bullets' and the
+        # rockets' arcs bend it, and so does the rocket frame turning while the bullet moves
+        # through it; every term shrinks with the square of the number of pieces.
+        radius = np.sqrt((end * end).sum(axis=1)).min()
+        point_travel = np.sqrt(((end - start) ** 2).sum(axis=1)).max()
+        rocket_travel = np.sqrt(((self.pos[rockets] - self.prev_pos[rockets]) ** 2).sum(axis=1)).max()
+        turn = np.arccos(np.clip((self.forward[rockets] * self.prev_forward[rockets]).sum(axis=1), -1.0, 1.0)).max()
+        turn += rocket_travel / radius # The rocket's up vector turns with it around the sphere
+        travel = point_travel + rocket_travel
+        # A path p(s) = R(s) w(s) curves by at most |p''| / 8 = (turn^2 |w| + 2 turn |w'|) / 8
+        sag = (arc_sag(point_travel, radius) + arc_sag(rocket_travel, radius)
+               + (turn * turn * (ROCKET_HIT_RADIUS + 2.0 * travel) + 2.0 * turn * travel) / 8.0)
+        return int(min(SWEEP_MAX_PIECES, max(1, math.ceil(math.sqrt(sag / SWEEP_MAX_SAG)))))
+
+    def first_hits(self, start, end, shooters, point_index, rocket_index):
+        # Narrow phase over candidate pairs (point_index[k], rocket_index[k]), where
+        # rocket_index is a position in self.slots. Point i moves along the sphere from
+        # start[i] to end[i] over the tick. Returns, for each point, the position in self.slots
+        # of the rocket whose cone it enters first (ties go to slot order), excluding the
+        # point's own shooter; -1 for no hit.
+        first = np.full(len(start), -1, dtype=np.intp)
+        keep = shooters[point_index] != self.slots[rocket_index]
+        point_index, rocket_index = point_index[keep], rocket_index[keep]
+        if len(point_index) == 0: return first
+        rockets, pair_rocket = np.unique(rocket_index, return_inverse=True)
+        pieces = self.sweep_pieces(start[point_index], end[point_index], rockets)
+
+        entry = np.full(len(point_index), np.inf)
+        local_start = to_local(self.frames_at(0.0, rockets)[pair_rocket], start[point_index])
+        for piece in range(pieces):
+            s0, s1 = piece / pieces, (piece + 1) / pieces
+            local_end = to_local(self.frames_at(s1, rockets)[pair_rocket], arc_points(start, end, s1)[point_index])
+            todo = np.isinf(entry) # Pieces run in order, so a pair's first entry is its earliest
+            entry[todo] = s0 + cone_entry_times(local_start[todo], local_end[todo]) * (s1 - s0)
+            local_start = local_end
+
+        hit = np.isfinite(entry)
+        point_index, rocket_index, entry = point_index[hit], rocket_index[hit], entry[hit]
+        order = np.lexsort((rocket_index, entry, point_index))
+        hit_points, first_pair = np.unique(point_index[order], return_index=True)
+        first[hit_points] = rocket_index[order][first_pair]
+        return first
+
+
+# --- Collision Backends ---
+# A collision backend's first_hits(slots, rocket_start, rocket_end, prev_forward, forward,
+# start, end, shooters, world_radius) takes the active rockets' slots with their positions and
+# headings at the start and end of a tick, and the bullets' moves over it. It returns, for each
+# bullet, the position in `slots` of the first rocket it hits other than its shooter, or -1,
+# and the number of bullet-rocket pairs its narrow phase tested (None if it cannot tell, as
+# with Panda3D's traverser). The Simulation turns those
+# hits into kills, P&L and removals. SweptConeBackend is the exact reference; collision.py
+# registers a Panda3D CollisionTraverser backend as 'panda'.
+class SweptConeBackend:
+    name = 'cone'
+
+    def __init__(self):
+        self.cone_collider = ConeCollider()
+        self.rocket_grid = SphereGrid() # Rebuilt over the active rockets' moves every tick; rows match cone_collider.slots
+
+    def first_hits(self, slots, rocket_start, rocket_end, prev_forward, forward, start, end, shooters, world_radius):
+        self.cone_collider.set_rockets(slots, rocket_end, forward, rocket_start, prev_forward)
+        # Broadphase: only rockets whose hit radius the bullet's path comes within during the
+        # tick are tested. Along its arc, every bullet and rocket stays within half its travel
+        # of the midpoint of its move, and the sweep's straight pieces add at most SWEEP_MAX_SAG.
+        self.rocket_grid.rebuild((rocket_start + rocket_end) / 2.0, world_radius)
+        half_travel = np.sqrt(((end - start) ** 2).sum(axis=1)).max(initial=0.0) / 2.0
+        rocket_half_travel = np.sqrt(((rocket_end - rocket_start) ** 2).sum(axis=1)).max(initial=0.0) / 2.0
+        reach = ROCKET_HIT_RADIUS + half_travel + rocket_half_travel + SWEEP_MAX_SAG
+        point_index, rocket_index = self.rocket_grid.query_pairs((start + end) / 2.0, reach)
+        return self.cone_collider.first_hits(start, end, shooters, point_index, rocket_index), point_index.size
+
+
+COLLISION_BACKENDS = {'cone': SweptConeBackend}
+
+def make_collision_backend(name='cone', *args, **kwargs):
+    return COLLISION_BACKENDS[name](*args, **kwargs)
+
+
+# --- Simulation ---
+# One round of Rocket Sphere. Slot 0 is the player, steered through step()'s `turn` and
+# `shoot` arguments (or by the standard AI when player_ai is set); slots 1..NUM_HUNT_BOTS
+# are hunt bots and the rest run the standard AI. All randomness comes from the seeded
+# NumPy generator, so a seed and a sequence of step() inputs fully determine a round.
+# The round always advances in fixed ticks of 1 / tick_rate simulated seconds.
+# num_rockets and tick_rate default to STARTING_ROCKETS and SIM_TICK_RATE as they are when
+# the Simulation is made.
+class Simulation:
+    def __init__(self, num_rockets=None, seed=None, player_ai=False, tick_rate=None, collision=None,
+                 ai_scheduler=None):
+        self.num_rockets = STARTING_ROCKETS if num_rockets is None else num_rockets
+        self.player_ai = player_ai
+        self.tick_dt = 1.0 / (SIM_TICK_RATE if tick_rate is None else tick_rate)
+        self.collision = collision or SweptConeBackend() # A collision backend, see COLLISION_BACKENDS
+        self.ai_scheduler = ai_scheduler or AIScheduler() # See every_tick_scheduler() for runs without AI LOD
+        self.ai_visible = None # Optional slot mask of rockets the renderer can see, for AI LOD
+        self.recorder = None # Optional replay.ReplayWriter, handed the state after every tick
+        self.profiler = None # Optional profiler.FrameProfiler, timed per phase of every tick
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.tick = 0
+        self.time = 0.0
+        self.accumulator = 0.0 # Simulated time owed by advance() but not yet ticked
+        self.world_radius = STARTING_WORLD_RADIUS
+        self.time_dilator = 1.0
+        self.round_pnl = -ANTE_COST
+        self.result = None # 'won' or 'lost' once the round is over
+        self.world_snapshot = None
+
+        n = self.num_rockets
+        self.player = 0
+        self.state = state = RocketState(n)
+        # Each shooter has at most kills + 1 bullets out and kills are bounded by the rockets
+        # destroyed, so 2n slots cover a round; the pool still grows if it is ever outrun
+        self.bullets = BulletStore(n, capacity=2 * n)
+        self.ai_scheduler.reset(n)
+        state.count = n
+        state.active[:n] = True
+        state.is_player[0] = True
+        state.is_hunt_bot[1:NUM_HUNT_BOTS + 1] = True
+        state.pos[:n] = generate_spawn_points(n)[self.rng.permutation(n)]
+
+        state.speed[:n] = ROCKET_FORWARD_SPEED
+        state.base_turn_speed[:n] = ROCKET_TURN_SPEED
+        standard_ai = ~state.is_player[:n] & ~state.is_hunt_bot[:n]
+        state.is_ace[:n] = standard_ai & (self.rng.random(n) < AI_ACE_CHANCE)
+        state.speed[state.is_ace] *= AI_ACE_SPEED_BONUS
+        state.base_turn_speed[state.is_ace] *= AI_ACE_TURN_BONUS
+        state.turn_speed[:n] = state.base_turn_speed[:n]
+
+        state.forward[:n] = initial_forward_rows(state.pos[:n])
+        state.velocity[:n] = state.forward[:n] * state.speed[:n, None]
+        state.prev_pos[:n], state.prev_forward[:n] = state.pos[:n], state.forward[:n]
+        state.jink_timer[:n] = self.rng.uniform(0, AI_JINK_INTERVAL, n)
+        self.update_time_dilator() # A full fleet starts the round at MIN_TIME_DILATOR
+
+    @property
+    def alive_count(self):
+        return int(np.count_nonzero(self.state.active[:self.state.count]))
+
+    @property
+    def player_alive(self):
+        return bool(self.state.active[self.player])
+
+    @property
+    def alpha(self):
+        # Fraction of a tick left in the accumulator, for interpolating between ticks
+        return self.accumulator / self.tick_dt
+
+    def advance(self, real_dt, turn=0, shoot=False):
+        # Consume `real_dt` seconds of wall-clock time. The time dilator scales how much
+        # simulated time that buys; it is then run as whole fixed ticks, at most
+        # MAX_TICKS_PER_FRAME of them. Returns the number of ticks run.
+        if self.result is not None: return 0
+        self.accumulator += real_dt * self.time_dilator
+        ticks = 0
+        while self.accumulator >= self.tick_dt and self.result is None:
+            if ticks == MAX_TICKS_PER_FRAME:
+                self.accumulator %= self.tick_dt
+                break
+            self.step(turn, shoot)
+            self.accumulator -= self.tick_dt
+            ticks += 1
+        return ticks
+
+    def step(self, turn=0, shoot=False):
+        # Run one fixed tick. The world shrinks on real time, i.e. by the wall-clock
+        # time this tick stands for at the current time dilation.
+        if self.result is not None: return
+        prof = self.profiler
+        sim_dt = self.tick_dt
+        self.update_world_shrink(sim_dt / self.time_dilator)
+
+        world = self.world_snapshot = WorldSnapshot(self.state, self.world_radius)
+        if prof: prof.lap('world')
+        if not self.player_ai: self.control_player(sim_dt, turn, shoot)
+        thinkers, think_dt = self.schedule_ai(world)
+        is_hunt_bot = self.state.is_hunt_bot[thinkers]
+        self.update_hunt_bots(thinkers[is_hunt_bot], think_dt[is_hunt_bot], world)
+        self.update_standard_ai(thinkers[~is_hunt_bot], think_dt[~is_hunt_bot], world)
+        if prof: prof.lap('ai'); prof.add_count('thinkers', thinkers.size)
+
+        self.state.update(sim_dt, self.world_radius)
+        if prof: prof.lap('movement')
+        self.update_bullets(sim_dt)
+
+        if not self.player_alive:
+            self.result = 'lost'
+        elif self.alive_count == 1:
+            self.result = 'won'
+            self.round_pnl += WIN_BONUS
+        self.tick += 1
+        self.time += sim_dt
+        self.update_time_dilator()
+        if self.recorder: self.recorder.record(self)
+        if prof:
+            prof.lap('record')
+            prof.add_count('ticks', 1)
+            prof.count('alive_rockets', self.alive_count)
+            prof.count('live_bullets', len(self.bullets))
+
+    def update_time_dilator(self):
+        start_count = self.num_rockets; end_count = 2
+        rocket_range = float(start_count - end_count)
+        if rocket_range <= 0: self.time_dilator = 1.0; return
+        progress = (start_count - self.alive_count) / rocket_range
+        progress = max(0.0, min(1.0, progress))
+        eased_progress = progress ** 2
+        time_range = MAX_TIME_DILATOR - MIN_TIME_DILATOR
+        self.time_dilator = MIN_TIME_DILATOR + (eased_progress * time_range)
+
+    def update_world_shrink(self, dt):
+        rocket_range = float(self.num_rockets - 2)
+        if rocket_range <= 0: target_radius = MIN_WORLD_RADIUS
+        else:
+            progress = max(0.0, min(1.0, (self.alive_count - 2) / rocket_range))
+            radius_range = STARTING_WORLD_RADIUS - MIN_WORLD_RADIUS
+            target_radius = MIN_WORLD_RADIUS + (progress * radius_range)
+        interp_factor = 1.0 - math.exp(-dt * WORLD_SHRINK_SPEED)
+        self.world_radius += (target_radius - self.world_radius) * interp_factor
+
+    # --- Rocket Actions ---
+    def steer(self, idx, turn_force, dt):
+        # Bend the velocity of rockets `idx` by `turn_force` over `dt` (scalar or per rocket), keeping their speed
+        state = self.state
+        dt = np.reshape(dt, (-1, 1))
+        state.velocity[idx] = normalized_rows(state.velocity[idx] + turn_force * dt) * state.speed[idx, None]
+
+    def shoot(self, idx):
+        # N+1 bullet rule: You can have N kills + 1 bullets out at a time.
+        state = self.state
+        idx = idx[(self.bullets.live_count[idx] < state.kills[idx] + 1) & (state.shoot_timer[idx] <= 0)]
+        if idx.size == 0: return
+        state.shoot_timer[idx] = SHOOT_COOLDOWN
+        forward = state.forward[idx]
+        self.bullets.spawn(state.pos[idx] + forward * BULLET_SPAWN_OFFSET, forward * BULLET_SPEED, idx, BULLET_LIFETIME)
+
+        state.speed[idx] *= 0.99
+        state.velocity[idx] = normalized_rows(state.velocity[idx]) * state.speed[idx, None]
+        state.turn_speed[idx] *= (1.0 - TURN_PENALTY_ON_MISS)
+
+    def register_kills(self, shooters):
+        # Credit one kill per entry of `shooters` (a slot may appear more than once)
+        state = self.state
+        counts = np.bincount(shooters, minlength=state.count)
+        idx = np.flatnonzero(counts)
+        kills = counts[idx]
+        state.kills[idx] += kills
+        if TURN_RADIUS_DECREASE_PER_KILL < 1.0:
+            state.turn_speed[idx] *= (1 / (1 - TURN_RADIUS_DECREASE_PER_KILL)) ** kills
+        state.speed[idx] *= 1.05 ** kills
+        state.velocity[idx] = normalized_rows(state.velocity[idx]) * state.speed[idx, None]
+
+    # --- Control & AI ---
+    def control_player(self, dt, turn, shoot):
+        state, p = self.state, np.array([self.player])
+        if not state.active[self.player]: return
+        if turn != 0:
+            up = normalized_rows(state.pos[p])
+            right = np.cross(normalized_rows(state.velocity[p]), up)
+            self.steer(p, right * turn * state.turn_speed[p, None], dt)
+        if shoot: self.shoot(p)
+
+    def schedule_ai(self, world):
+        # AI slots thinking this tick and the simulated time since each one last thought
+        state = self.state
+        n = state.count
+        ai = state.active[:n].copy()
+        if not self.player_ai: ai &= ~state.is_player[:n]
+        ai = np.flatnonzero(ai)
+        thinkers, elapsed = self.ai_scheduler.schedule(ai, world.pos, world.pos[self.player], self.tick, self.ai_visible)
+        return thinkers, elapsed * self.tick_dt
+
+    def update_hunt_bots(self, hunters, dt, world):
+        # Chase the nearest enemy and shoot when the lead solution lines up
+        state = self.state
+        targets = world.nearest(hunters)
+        hunters, targets, dt = hunters[targets >= 0], targets[targets >= 0], dt[targets >= 0]
+        if hunters.size == 0: return
+
+        my_pos = world.pos[hunters]
+        my_forward = normalized_rows(state.velocity[hunters])
+        final_dir = tangent_directions(world.pos[targets] - my_pos, normalized_rows(my_pos))
+        chasing = (final_dir * final_dir).sum(axis=1) > 0
+        self.steer(hunters[chasing], final_dir[chasing] * state.turn_speed[hunters[chasing], None], dt[chasing])
+
+        aim_dir = intercept_directions(my_pos, world.pos[targets], world.velocity[targets], world.world_radius)
+        self.shoot(hunters[(my_forward * aim_dir).sum(axis=1) > AI_LEAD_SHOT_ACCURACY])
+
+    def update_standard_ai(self, ai, dt, world):
+        # `ai` are the thinking standard-AI slots, `dt` the time since each last thought
+        state = self.state
+        if ai.size == 0: return
+        up = normalized_rows(world.pos[ai])
+        right = np.cross(normalized_rows(state.velocity[ai]), up)
+
+        # 1. OFFENSE: Always be looking for a shot (solved for all thinkers in one batch)
+        is_shooter = np.zeros(len(world.active), dtype=bool)
+        is_shooter[ai] = True
+        self.shoot(ai[world.shot_solutions(is_shooter)[ai]])
+
+        # 2. SURVIVAL/MOVEMENT: Jink or Hunt
+        jinking = state.jinking_time_left[ai] > 0
+        jinkers = ai[jinking]
+        state.jinking_time_left[jinkers] -= dt[jinking]
+        turn_force = right[jinking] * (state.evade_dir[jinkers] * state.turn_speed[jinkers] * 1.5)[:, None]
+        self.steer(jinkers, turn_force, dt[jinking])
+
+        hunting = ~jinking
+        due = hunting & (state.jink_timer[ai] <= 0)
+        starts = np.zeros(ai.size, dtype=bool)
+        starts[due] = self.rng.random(np.count_nonzero(due)) < AI_JINK_CHANCE
+        state.jinking_time_left[ai[starts]] = AI_JINK_DURATION
+        state.evade_dir[ai[starts]] = self.rng.choice(np.array([-1, 1], dtype=np.int8), np.count_nonzero(starts))
+        state.jink_timer[ai[due]] = AI_JINK_INTERVAL
+        hunting &= ~starts
+
+        # If not jinking, hunt a target
+        hunters, up, dt = ai[hunting], up[hunting], dt[hunting]
+        targets = state.target[hunters]
+        lost = (targets < 0) | ~world.active[np.maximum(targets, 0)]
+        retarget = hunters[lost | (self.rng.random(hunters.size) < AI_RETARGET_CHANCE)]
+        state.target[retarget] = world.best_targets(retarget)
+        targets = state.target[hunters]
+        has_target = targets >= 0
+        hunters, targets, up, dt = hunters[has_target], targets[has_target], up[has_target], dt[has_target]
+
+        tail_position = world.pos[targets] - normalized_rows(world.velocity[targets]) * AI_OPTIMAL_DISTANCE
+        final_dir = tangent_directions(tail_position - world.pos[hunters], up)
+        steering = (final_dir * final_dir).sum(axis=1) > 0
+        self.steer(hunters[steering], final_dir[steering] * state.turn_speed[hunters[steering], None], dt[steering])
+        # If no target, just cruise (jinking will handle evasion)
+
+    # --- Bullets ---
+    def update_bullets(self, dt):
+        bullets, state, prof = self.bullets, self.state, self.profiler
+        live = bullets.integrate(dt, self.world_radius)
+        if prof: prof.lap('bullets')
+
+        # --- Collision Detection ---
+        slots = np.flatnonzero(state.active[:state.count])
+        hits, pairs = self.collision.first_hits(slots, state.prev_pos[slots], state.pos[slots],
+                                                state.prev_forward[slots], state.forward[slots],
+                                                bullets.prev_pos[live], bullets.pos[live], bullets.shooter[live],
+                                                self.world_radius)
+        if prof:
+            prof.lap('collision')
+            if pairs is not None: prof.add_count('pairs', pairs)
+
+        hit_bullets = live[hits >= 0]
+        destroyed = slots[hits[hits >= 0]]
+        shooters = bullets.shooter[hit_bullets]
+        bullets.deactivate(hit_bullets)
+        # Shooters hit this tick still get credit; rockets are only removed afterwards
+        credited = shooters[(shooters >= 0) & state.active[np.maximum(shooters, 0)]]
+        self.register_kills(credited)
+        self.round_pnl += KILL_REWARD * np.count_nonzero(credited == self.player)
+
+        bullets.compact()
+        state.active[destroyed] = False
+        if prof: prof.lap('removal')
+
+
+# --- Render Snapshot ---
+# Everything a renderer and HUD read from a Simulation, copied out between ticks with the
+# rockets and bullets already interpolated by the sim's alpha. The Simulation's own arrays
+# and a snapshot form a double buffer: the sim can run its next ticks (on another thread,
+# as pantheon.py does) while the last snapshot is drawn.
+class SimSnapshot:
+    def __init__(self, sim):
+        state, bullets, p = sim.state, sim.bullets, sim.player
+        alpha = sim.alpha
+        self.pos, self.forward = state.lerp(alpha)
+        self.active = state.active[:state.count].copy()
+        self.bullet_pos = bullets.lerp_pos(alpha)
+        self.player = p
+        self.player_alive = sim.player_alive
+        self.player_velocity = state.velocity[p].copy()
+        self.player_kills = int(state.kills[p])
+        self.player_bullets = bullets.active_count(p)
+        self.player_speed = float(state.speed[p])
+        self.player_turn_speed = float(state.turn_speed[p])
+        self.alive_count = sim.alive_count
+        self.world_radius = sim.world_radius
+        self.round_pnl = sim.round_pnl
+        self.time_dilator = sim.time_dilator
+        self.tick = sim.tick
+        self.result = sim.result
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from simulation import SweptConeBackend
+
+# Shared fixtures for the headless suites.
+
+
+# Runs the reference backend and keeps every tick's inputs and hits. Given the Simulation it
+# serves, it also keeps the bullet row and velocity behind each point it was handed.
+class RecordingBackend(SweptConeBackend):
+    def __init__(self, sim=None):
+        super().__init__()
+        self.sim = sim
+        self.ticks = [] # (args, hits) per call
+        self.bullets = [] # (rows, velocity) per call, when recording a Simulation
+
+    def first_hits(self, *args):
+        if self.sim is not None:
+            bullets = self.sim.bullets
+            rows = np.flatnonzero(bullets.active[:bullets.count])
+            self.bullets.append((rows, bullets.velocity[rows]))
+        hits, pairs = super().first_hits(*args)
+        self.ticks.append((args, hits))
+        return hits, pairs
+
+@pytest.fixture
+def recorder():
+    return RecordingBackend()
@@ -0,0 +1,60 @@
+import numpy as np
+
+import collision # Registers the 'panda' backend  # noqa: F401
+from simulation import (
+    BULLET_SPEED, STARTING_WORLD_RADIUS, make_collision_backend, normalized_rows, tangent_directions,
+)
+
+# The Panda3D CollisionTraverser backend against SweptConeBackend on scenes where the rockets
+# hold still for the tick, so the only difference left between them is the faceted hitbox.
+
+# --- Configuration & Constants ---
+SCENE_SIZE = 1000 # Rockets, each with one bullet aimed past it
+TICK_RATE = 15.0
+MAX_DIFFER = 0.05 # Share of the reference's hits the facets may gain or lose
+
+
+# --- Helpers ---
+def still_scene(rng, miss):
+    # Rockets in every third slot, none moving, each with a bullet crossing within about
+    # `miss` units of it over one tick; returns the first_hits arguments, shooters unset
+    n = SCENE_SIZE
+    slots = np.arange(n) * 3 + 2
+    up = normalized_rows(rng.normal(size=(n, 3)))
+    pos = up * STARTING_WORLD_RADIUS
+    forward = tangent_directions(rng.normal(size=(n, 3)), up)
+    target = normalized_rows(pos + rng.normal(size=(n, 3)) * miss) * STARTING_WORLD_RADIUS
+    direction = tangent_directions(rng.normal(size=(n, 3)), normalized_rows(target))
+    half = BULLET_SPEED / TICK_RATE / 2.0
+    start = normalized_rows(target - direction * half) * STARTING_WORLD_RADIUS
+    end = normalized_rows(target + direction * half) * STARTING_WORLD_RADIUS
+    return [slots, pos, pos, forward, forward, start, end, np.full(n, -1), STARTING_WORLD_RADIUS]
+
+
+# --- Tests ---
+def test_panda_matches_reference_on_still_rockets():
+    rng = np.random.default_rng(3)
+    for miss in (1.0, 2.0, 3.0):
+        args = still_scene(rng, miss)
+        expected, _ = make_collision_backend('cone').first_hits(*args)
+        hits, pairs = make_collision_backend('panda').first_hits(*args)
+        assert pairs is None
+        assert np.count_nonzero(expected >= 0) > SCENE_SIZE // 3
+        assert np.count_nonzero(hits != expected) <= MAX_DIFFER * np.count_nonzero(expected >= 0)
+
+def test_panda_hits_are_positions_in_slots():
+    # Slots run 2, 5, 8, ...; a hit on the rocket a bullet was aimed at is that rocket's row
+    args = still_scene(np.random.default_rng(4), 1.0)
+    hits, _ = make_collision_backend('panda').first_hits(*args)
+    assert np.all(hits < SCENE_SIZE)
+    assert np.count_nonzero(hits == np.arange(SCENE_SIZE)) > 0.9 * SCENE_SIZE
+
+def test_panda_never_hits_the_shooter():
+    # Every bullet is fired by the rocket it crosses, so only a neighbour can be hit
+    args = still_scene(np.random.default_rng(5), 1.0)
+    slots = args[0]
+    args[7] = slots.copy()
+    hits, _ = make_collision_backend('panda').first_hits(*args)
+    hit = hits >= 0
+    assert np.all(slots[hits[hit]] != args[7][hit])
+    assert np.count_nonzero(hit) < 0.05 * SCENE_SIZE
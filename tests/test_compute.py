@@ -0,0 +1,112 @@
+import struct
+
+import numpy as np
+import pytest
+
+from compute import (
+    BULLET_STD140, BULLET_SURFACE_OFFSET, COMPUTE_BACKENDS, ROCKET_BUFFER_RADIUS, ROCKET_STD140,
+    CpuComputeBackend, buffer_bytes, make_compute_backend, pack_bullets, pack_rockets,
+)
+from simulation import ROCKET_HIT_RADIUS, Simulation
+
+# compute.py against the std140 layout collision_compute.glsl declares and against the
+# Simulation's own bullet update, all headless.
+
+
+# --- Helpers ---
+def played_sim(num_rockets=400, seed=5, ticks=120):
+    # A round the AI has played for a while, so bullets are in flight and rockets have died
+    sim = Simulation(num_rockets=num_rockets, seed=seed, player_ai=True)
+    for _ in range(ticks): sim.step()
+    return sim
+
+
+# --- std140 Layouts ---
+def test_rocket_buffer_matches_struct_pack_into():
+    sim = played_sim(num_rockets=50, ticks=30)
+    state = sim.state
+    expected = bytearray(ROCKET_STD140.itemsize * state.count)
+    for i in range(state.count):
+        offset = i * ROCKET_STD140.itemsize
+        struct.pack_into('<4f', expected, offset, *state.pos[i], ROCKET_BUFFER_RADIUS)
+        struct.pack_into('<i', expected, offset + 16, int(state.active[i]))
+        struct.pack_into('<3f', expected, offset + 32, 0.0, 0.0, 0.0)
+    assert buffer_bytes(pack_rockets(state)).tobytes() == bytes(expected)
+
+def test_bullet_buffer_matches_struct_pack_into():
+    sim = played_sim(num_rockets=50, ticks=30)
+    bullets = sim.bullets
+    assert len(bullets) > 0
+    expected = bytearray(BULLET_STD140.itemsize * bullets.count)
+    for i in range(bullets.count):
+        offset = i * BULLET_STD140.itemsize
+        lifetime = bullets.max_age[i] - bullets.age[i] if bullets.active[i] else 0.0
+        struct.pack_into('<4f', expected, offset, *bullets.pos[i], 0.0)
+        struct.pack_into('<3f', expected, offset + 16, *bullets.velocity[i])
+        struct.pack_into('<f', expected, offset + 28, lifetime)
+    assert buffer_bytes(pack_bullets(bullets)).tobytes() == bytes(expected)
+
+def test_buffer_bytes_shares_memory():
+    rockets = np.zeros(3, dtype=ROCKET_STD140)
+    view = buffer_bytes(rockets)
+    assert view.size == 3 * 48
+    rockets['is_active'][1] = 7
+    assert view[48 + 16] == 7
+
+def test_pack_into_preallocated_buffer():
+    sim = played_sim(num_rockets=50, ticks=30)
+    out = np.zeros(sim.state.count + 10, dtype=ROCKET_STD140)
+    rockets = pack_rockets(sim.state, out=out)
+    assert np.shares_memory(rockets, out)
+    assert np.array_equal(buffer_bytes(rockets), buffer_bytes(pack_rockets(sim.state)))
+
+
+# --- Backends ---
+def test_registered_backends_are_built_by_name(monkeypatch):
+    # A GPU module plugs in the same way: by adding its class to COMPUTE_BACKENDS
+    class DummyBackend:
+        name = 'dummy'
+
+        def __init__(self, window):
+            self.window = window
+
+    monkeypatch.setitem(COMPUTE_BACKENDS, 'dummy', DummyBackend)
+    backend = make_compute_backend('dummy', 'window')
+    assert isinstance(backend, DummyBackend) and backend.window == 'window'
+    assert isinstance(make_compute_backend(), CpuComputeBackend)
+    with pytest.raises(KeyError): make_compute_backend('gl')
+
+def test_cpu_dispatch_matches_update_bullets(recorder):
+    # One tick of the kernel against Simulation.update_bullets from the same state. The rockets
+    # are held still for the tick, and the kernel's surface offset is taken out of the world
+    # radius, so both move the bullets to the same place. The kernel tests the bullets' end
+    # points against spheres that enclose the cones, so every cone hit that ends inside its
+    # rocket's sphere must be a kernel hit too; swept hits that clip a cone earlier in the
+    # tick are the simulation's alone.
+    sim = played_sim()
+    sim.collision, recorder.sim = recorder, sim
+    backend = CpuComputeBackend()
+    checked = 0
+    for _ in range(60):
+        state, bullets = sim.state, sim.bullets
+        n = state.count
+        state.prev_pos[:n], state.prev_forward[:n] = state.pos[:n], state.forward[:n]
+        rockets, packed = pack_rockets(state), pack_bullets(bullets)
+        backend.dispatch(rockets, packed, sim.tick_dt, sim.world_radius - BULLET_SURFACE_OFFSET)
+        sim.update_bullets(sim.tick_dt)
+
+        # Every bullet the simulation kept in flight moved like the kernel moved it
+        (slots, _, _, _, _, _, end, _, _), hits = recorder.ticks[-1]
+        rows, velocity = recorder.bullets[-1]
+        assert np.all(packed['lifetime'][rows] > -1e-4)
+        np.testing.assert_allclose(packed['position_padding'][rows, :3], end, atol=1e-3)
+        np.testing.assert_allclose(packed['velocity'][rows], velocity, atol=1e-3)
+
+        hit = hits >= 0
+        rocket_pos = state.pos[slots[hits[hit]]]
+        # A hair inside, so float32 rounding in the kernel cannot put the end point on the boundary
+        inside = ((end[hit] - rocket_pos) ** 2).sum(axis=1) < (ROCKET_HIT_RADIUS - 1e-3) ** 2
+        assert np.all(packed['lifetime'][rows[hit][inside]] == 0.0)
+        checked += np.count_nonzero(inside)
+        sim.step()
+    assert checked > 0
@@ -0,0 +1,115 @@
+import math
+
+import numpy as np
+import pytest
+
+import simulation
+from simulation import (
+    BULLET_RADIUS, BULLET_SPEED, ROCKET_CONE_HEIGHT, ROCKET_CONE_RADIUS, ROCKET_FORWARD_SPEED,
+    ROCKET_TURN_SPEED, SWEEP_MAX_SAG, AI_ACE_SPEED_BONUS, AI_ACE_TURN_BONUS,
+    ConeCollider, Simulation, arc_points, normalized_rows, tangent_directions, to_local,
+)
+
+# The swept collider against a brute-force reference: every bullet and rocket is stepped
+# through the tick in DENSE_SAMPLES even steps along the same arcs and turns the collider
+# sweeps (ConeCollider.frames_at and arc_points), and each sampled bullet position is tested
+# against the cone directly. A bullet the samples find inside a cone must be reported as a
+# hit. The collider may miss a graze shallower than SWEEP_MAX_SAG, the error it allows
+# its straight pieces, so the reference only counts samples at least that deep.
+
+# --- Configuration & Constants ---
+TICK_RATES = (60.0, 15.0, 5.0)
+WORLD_RADII = (450.0, 150.0, 50.0)
+DENSE_SAMPLES = 401
+SCENE_SIZE = 400 # Rocket-bullet pairs per synthetic scene
+MAX_TURN_RATE = ROCKET_TURN_SPEED * AI_ACE_TURN_BONUS * 1.5 / ROCKET_FORWARD_SPEED # Radians per second, jinking
+MAX_ROCKET_SPEED = ROCKET_FORWARD_SPEED * AI_ACE_SPEED_BONUS * 1.05 ** 5 # An ace with a few kills
+
+
+# --- Helpers ---
+def cone_depth(local):
+    # How far inside the padded cone (distance to its nearest face) each local point is;
+    # negative outside
+    slope = ROCKET_CONE_RADIUS / ROCKET_CONE_HEIGHT
+    y = local[:, 1]
+    radius = slope * (y + ROCKET_CONE_HEIGHT / 2.0) + BULLET_RADIUS
+    side = (radius - np.sqrt(local[:, 0] ** 2 + local[:, 2] ** 2)) / math.sqrt(1.0 + slope * slope)
+    return np.minimum(np.minimum(y + ROCKET_CONE_HEIGHT / 2.0, ROCKET_CONE_HEIGHT / 2.0 - y), side)
+
+def sampled_hits(collider, start, end, shooters, point_index, rocket_index):
+    # Points of `start`/`end` that some sample puts at least SWEEP_MAX_SAG inside the cone of
+    # a paired rocket other than their shooter
+    keep = shooters[point_index] != collider.slots[rocket_index]
+    point_index, rocket_index = point_index[keep], rocket_index[keep]
+    hit = np.zeros(len(start), dtype=bool)
+    for s in np.linspace(0.0, 1.0, DENSE_SAMPLES):
+        local = to_local(collider.frames_at(s, rocket_index), arc_points(start, end, s)[point_index])
+        hit[point_index[cone_depth(local) >= SWEEP_MAX_SAG]] = True
+    return hit
+
+def rotate_about(v, axis, angle):
+    # Rows of `v` rotated by `angle` about the unit rows of `axis`
+    cos, sin = np.cos(angle)[:, None], np.sin(angle)[:, None]
+    return v * cos + np.cross(axis, v) * sin + axis * (axis * v).sum(axis=1, keepdims=True) * (1.0 - cos)
+
+def grazing_scene(rng, tick_rate, world_radius):
+    # SCENE_SIZE rockets turning as hard as the AI can over one tick, each with a bullet aimed
+    # to pass within a few units of it at a random moment of the tick
+    n, dt = SCENE_SIZE, 1.0 / tick_rate
+    up = normalized_rows(rng.normal(size=(n, 3)))
+    rocket_end = up * world_radius
+    forward = tangent_directions(rng.normal(size=(n, 3)), up)
+    prev_forward = rotate_about(forward, up, -rng.uniform(-1.0, 1.0, n) * MAX_TURN_RATE * dt)
+    rocket_start = normalized_rows(rocket_end - (prev_forward + forward) / 2.0 * MAX_ROCKET_SPEED * dt) * world_radius
+    prev_forward = tangent_directions(prev_forward, normalized_rows(rocket_start))
+
+    s = rng.uniform(0.0, 1.0, (n, 1))
+    target = normalized_rows(rocket_start + (rocket_end - rocket_start) * s) * world_radius + rng.normal(size=(n, 3)) * 1.5
+    direction = tangent_directions(rng.normal(size=(n, 3)), normalized_rows(target))
+    start = normalized_rows(target - direction * BULLET_SPEED * dt * s) * world_radius
+    end = normalized_rows(target + direction * BULLET_SPEED * dt * (1.0 - s)) * world_radius
+    return rocket_start, rocket_end, prev_forward, forward, start, end
+
+
+# --- Tests ---
+@pytest.mark.parametrize('world_radius', WORLD_RADII)
+@pytest.mark.parametrize('tick_rate', TICK_RATES)
+def test_no_missed_hits_on_grazing_paths(tick_rate, world_radius):
+    # Narrow phase only: every bullet is paired with the rocket it was aimed past
+    rng = np.random.default_rng(int(tick_rate * 1000 + world_radius))
+    checked = 0
+    for _ in range(5):
+        rocket_start, rocket_end, prev_forward, forward, start, end = grazing_scene(rng, tick_rate, world_radius)
+        pairs = np.arange(SCENE_SIZE)
+        collider = ConeCollider()
+        collider.set_rockets(pairs, rocket_end, forward, rocket_start, prev_forward)
+        shooters = np.full(SCENE_SIZE, -1)
+        hits = collider.first_hits(start, end, shooters, pairs, pairs)
+        expected = sampled_hits(collider, start, end, shooters, pairs, pairs)
+        assert np.array_equal(hits[expected], pairs[expected])
+        checked += np.count_nonzero(expected)
+    assert checked > SCENE_SIZE # Enough of the aimed bullets hit for the check to mean something
+
+@pytest.mark.parametrize('world_radius', WORLD_RADII)
+@pytest.mark.parametrize('tick_rate', TICK_RATES)
+def test_no_missed_hits_in_played_rounds(tick_rate, world_radius, monkeypatch, recorder):
+    # Broadphase and narrow phase on the ticks of a round the AI plays on a world of this size.
+    # The reference tests every bullet against every rocket other than its shooter.
+    monkeypatch.setattr(simulation, 'STARTING_WORLD_RADIUS', world_radius)
+    monkeypatch.setattr(simulation, 'MIN_WORLD_RADIUS', min(simulation.MIN_WORLD_RADIUS, world_radius))
+    sim = Simulation(num_rockets=300, seed=7, player_ai=True, tick_rate=tick_rate, collision=recorder)
+    for _ in range(int(2.0 * tick_rate)): sim.step()
+
+    checked = 0
+    for (slots, rocket_start, rocket_end, prev_forward, forward, start, end, shooters, _), hits in recorder.ticks:
+        if len(start) == 0: continue
+        collider = ConeCollider()
+        collider.set_rockets(slots, rocket_end, forward, rocket_start, prev_forward)
+        # Every pair whose paths come anywhere near each other over the tick
+        reach = simulation.ROCKET_HIT_RADIUS + BULLET_SPEED / tick_rate + MAX_ROCKET_SPEED / tick_rate
+        delta = start[:, None, :] - rocket_start[None, :, :]
+        point_index, rocket_index = np.nonzero((delta * delta).sum(axis=2) < reach * reach)
+        expected = sampled_hits(collider, start, end, shooters, point_index, rocket_index)
+        assert np.all(hits[expected] >= 0)
+        checked += np.count_nonzero(expected)
+    assert checked > 0
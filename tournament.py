@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import simulation
+from simulation import Simulation, every_tick_scheduler, normalized_rows
+
+# Headless tournament runner: plays many seeded rounds of Rocket Sphere across a process
+# pool and reports the economics of the player slot. Each round is fully determined by
+# its seed, the player policy and any constant overrides, so any round can be replayed.
+#
+#   python tournament.py --rounds 2000 --player ai --output results.npz
+#   python tournament.py --rounds 500 --set KILL_REWARD=0.3 --set AI_SHOOT_RANGE=120
+#   python tournament.py --rounds 5000 --tick-rate 15   # coarser ticks; collisions are swept
+#   python tournament.py --rounds 500 --ai-lod          # AI thinks on the game's distance tiers
+
+# --- Configuration & Constants ---
+DEFAULT_ROUNDS = 100
+DEFAULT_MAX_ROUND_TIME = 600.0 # Simulated seconds before a round is called a timeout
+RESULT_CODES = {'lost': 0, 'won': 1, 'timeout': 2}
+
+# --- Player Policies ---
+# A policy maps the simulation to the (turn, shoot) input for the player's next tick.
+def scripted_player(sim):
+    # Steer toward the nearest rocket and keep the trigger held
+    state, p = sim.state, sim.player
+    others = state.active[:state.count].copy()
+    others[p] = False
+    if not others.any(): return 0, True
+    others = np.flatnonzero(others)
+    delta = state.pos[others] - state.pos[p]
+    target = others[np.argmin((delta * delta).sum(axis=1))]
+    up = normalized_rows(state.pos[[p]])[0]
+    right = np.cross(normalized_rows(state.velocity[[p]])[0], up)
+    return float(np.sign(np.dot(state.pos[target] - state.pos[p], right))), True
+
+PLAYER_POLICIES = {
+    'ai': None, # The standard AI flies the player slot (Simulation player_ai)
+    'scripted': scripted_player,
+}
+
+# Constants computed from others, with the function that recomputes each
+DERIVED_CONSTANTS = {'ROCKET_HIT_RADIUS': simulation.rocket_hit_radius}
+UNUSED_CONSTANTS = ('MIN_SPAWN_SEPARATION',) # Defined in simulation.py but read nowhere
+
+# --- Worker ---
+def apply_overrides(overrides):
+    # Constants are read from the simulation module when a Simulation (and its scheduler and
+    # grids) is made or at call time, so overriding them in a worker changes every round it
+    # plays. Derived constants are then recomputed from the overridden values.
+    for name, value in overrides.items():
+        setattr(simulation, name, value)
+    for name, derive in DERIVED_CONSTANTS.items():
+        setattr(simulation, name, derive())
+
+def play_round(seed, player, num_rockets, max_time, tick_rate, ai_lod=False):
+    # Without ai_lod every AI rocket thinks every tick, so the player's P&L does not depend
+    # on how far the other rockets happen to fly from it
+    policy = PLAYER_POLICIES[player]
+    sim = Simulation(num_rockets=num_rockets, seed=seed, player_ai=policy is None, tick_rate=tick_rate,
+                     ai_scheduler=None if ai_lod else every_tick_scheduler())
+    while sim.result is None and sim.time < max_time:
+        turn, shoot = policy(sim) if policy else (0, False)
+        sim.step(turn, shoot)
+    result = sim.result or 'timeout'
+    # Rockets still flying when the player went down all placed ahead of it
+    placement = 1 if result == 'won' else sim.alive_count + (result == 'lost')
+    return (seed, RESULT_CODES[result], int(sim.state.kills[sim.player]), placement,
+            sim.time, sim.tick, sim.round_pnl)
+
+def play_rounds(seeds, player, num_rockets, max_time, tick_rate, ai_lod=False):
+    return [play_round(seed, player, num_rockets, max_time, tick_rate, ai_lod) for seed in seeds]
+
+# --- Results ---
+COLUMNS = (
+    ('seed', np.int64), ('result', np.int8), ('kills', np.int32), ('placement', np.int32),
+    ('duration', np.float32), ('ticks', np.int32), ('round_pnl', np.float64),
+)
+
+def to_columns(rows):
+    rows = sorted(rows)
+    return {name: np.array([row[i] for row in rows], dtype=dtype) for i, (name, dtype) in enumerate(COLUMNS)}
+
+def save_results(path, columns, config):
+    np.savez_compressed(path, config=np.array(json.dumps(config)), **columns)
+
+def print_summary(columns, wall_time):
+    pnl = columns['round_pnl']
+    n = len(pnl)
+    stderr = pnl.std(ddof=1) / np.sqrt(n) if n > 1 else 0.0
+    result = columns['result']
+    print(f"Rounds:        {n} in {wall_time:.1f} s ({n / wall_time:.1f} rounds/s)")
+    print(f"Won / lost / timeout: {np.count_nonzero(result == RESULT_CODES['won'])} / "
+          f"{np.count_nonzero(result == RESULT_CODES['lost'])} / {np.count_nonzero(result == RESULT_CODES['timeout'])}")
+    print(f"Round P&L:     mean ${pnl.mean():+.4f} +/- {1.96 * stderr:.4f} (95% CI), "
+          f"median ${np.median(pnl):+.2f}, min ${pnl.min():+.2f}, max ${pnl.max():+.2f}")
+    print(f"Total P&L:     ${pnl.sum():+.2f}")
+    print(f"Kills:         mean {columns['kills'].mean():.2f}, max {columns['kills'].max()}")
+    print(f"Placement:     mean {columns['placement'].mean():.1f}, median {np.median(columns['placement']):.0f}, "
+          f"top 10 {np.mean(columns['placement'] <= 10):.1%}")
+    print(f"Duration:      mean {columns['duration'].mean():.1f} s simulated")
+
+def parse_override(text):
+    # Only plain numeric constants can be set; derived ones follow from what they are computed from
+    name, _, value = text.partition('=')
+    current = getattr(simulation, name, None)
+    if not name.isupper() or current is None: raise argparse.ArgumentTypeError(f"unknown constant {name}")
+    if name in DERIVED_CONSTANTS: raise argparse.ArgumentTypeError(f"{name} is derived and cannot be set")
+    if name in UNUSED_CONSTANTS: raise argparse.ArgumentTypeError(f"{name} is not used by the simulation")
+    if type(current) not in (int, float): raise argparse.ArgumentTypeError(f"{name} is not a number and cannot be set")
+    try: return name, type(current)(value)
+    except ValueError: raise argparse.ArgumentTypeError(f"{name} takes {type(current).__name__} values, not {value!r}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play seeded headless Rocket Sphere rounds in parallel.")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument('--seed', type=int, default=0, help="first round seed; rounds use seed, seed+1, ...")
+    parser.add_argument('--player', choices=sorted(PLAYER_POLICIES), default='ai')
+    parser.add_argument('--rockets', type=int, help="rockets per round (default: STARTING_ROCKETS)")
+    parser.add_argument('--max-time', type=float, default=DEFAULT_MAX_ROUND_TIME)
+    parser.add_argument('--tick-rate', type=float, help="simulation ticks per simulated second (default: SIM_TICK_RATE)")
+    parser.add_argument('--ai-lod', action='store_true',
+                        help="schedule AI thinking by distance to the player as the game does (default: every tick)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--set', type=parse_override, action='append', default=[], metavar='CONST=VALUE',
+                        help="override a simulation constant in every worker")
+    parser.add_argument('--output', help="columnar .npz result file")
+    args = parser.parse_args(argv)
+
+    overrides = dict(args.set)
+    # Resolve the defaults that come from constants as the workers will see them
+    apply_overrides(overrides)
+    if args.rockets is None: args.rockets = simulation.STARTING_ROCKETS
+    if args.tick_rate is None: args.tick_rate = simulation.SIM_TICK_RATE
+    seeds = list(range(args.seed, args.seed + args.rounds))
+    # Small chunks keep every worker busy while round lengths vary
+    chunk = max(1, len(seeds) // (args.workers * 8))
+    chunks = [seeds[i:i + chunk] for i in range(0, len(seeds), chunk)]
+
+    start = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(args.workers, initializer=apply_overrides, initargs=(overrides,)) as pool:
+        futures = [pool.submit(play_rounds, c, args.player, args.rockets, args.max_time, args.tick_rate,
+                               args.ai_lod) for c in chunks]
+        for future in futures:
+            rows.extend(future.result())
+            print(f"\r{len(rows)}/{len(seeds)} rounds", end='', file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    wall_time = time.perf_counter() - start
+
+    columns = to_columns(rows)
+    if args.output:
+        config = dict(vars(args), set=overrides)
+        save_results(args.output, columns, config)
+    print_summary(columns, wall_time)
+
+if __name__ == "__main__":
+    main()